@@ -0,0 +1,338 @@
+"""Offline benchmark harness for youtube_downloader.py.
+
+Stand-in extractors (benchmarks/yt_dlp_plugins) resolve `benchfake:` URLs to
+synthetic media served by a localhost HTTP server, so the downloader can be
+driven end to end without network access. Every scenario runs in its own
+subprocess (so peak RSS is per scenario) and the results are emitted as JSON
+that can be compared across versions.
+
+Usage:
+    python benchmarks/bench_downloader.py                  # full scenarios
+    python benchmarks/bench_downloader.py --quick          # small sizes, for a smoke run
+    python benchmarks/bench_downloader.py --scenarios playlist --concurrency 1,8 --output before.json
+"""
+import argparse
+import contextlib
+import http.server
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SCRIPT = os.path.join(REPO_DIR, 'youtube_downloader.py')
+
+SCENARIOS = ('startup', 'dedupe-index', 'playlist', 'playlist-existing')
+
+
+class MediaHandler(http.server.BaseHTTPRequestHandler):
+    """Serves /media/<size>/<name> as `size` bytes of synthetic data."""
+    protocol_version = 'HTTP/1.1'
+    chunk = b'\0' * 65536
+
+    def _size(self):
+        parts = self.path.split('/')
+        if len(parts) < 4 or parts[1] != 'media' or not parts[2].isdigit():
+            return None
+        return int(parts[2])
+
+    def do_HEAD(self):
+        size = self._size()
+        if size is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+
+    def do_GET(self):
+        size = self._size()
+        if size is None:
+            self.send_error(404)
+            return
+        self.do_HEAD()
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, len(self.chunk))
+            self.wfile.write(self.chunk[:n])
+            remaining -= n
+        with self.server.lock:
+            self.server.bytes_served += size
+
+    def log_message(self, *args):
+        pass
+
+
+def start_media_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), MediaHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.bytes_served = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def summarize(durations):
+    if not durations:
+        return {'count': 0}
+    ordered = sorted(durations)
+    return {
+        'count': len(ordered),
+        'total_s': round(sum(ordered), 4),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def fill_directory(path, count):
+    """Create `count` small unrelated files, like a long-lived download folder."""
+    os.makedirs(path, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(path, f'Existing upload {i} - archive copy_{i}.mkv'), 'wb') as f:
+            f.write(b'x')
+
+
+# ---------------------------------------------------------------------------
+# Scenarios (run inside a child process)
+# ---------------------------------------------------------------------------
+
+def scenario_startup(spec):
+    runs = []
+    for _ in range(spec['repeat']):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, '--help'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        runs.append(time.perf_counter() - start)
+    return {
+        'wall_s': round(sum(runs), 4),
+        'phases': {'help': summarize(runs)},
+        'median_ms': round(statistics.median(runs) * 1000, 2),
+    }
+
+
+def scenario_dedupe_index(spec):
+    import youtube_downloader as yd
+    workdir = tempfile.mkdtemp(prefix='bench-dedupe-')
+    try:
+        fill_directory(workdir, spec['files'])
+        start = time.perf_counter()
+        index = yd.DuplicateIndex(workdir)
+        build = time.perf_counter() - start
+        lookups = []
+        for i in range(spec['entries']):
+            # Alternate hits and misses
+            name = f'Existing upload {i} - archive copy_{i}.mp4' if i % 2 else f'Bench clip {i}_{i + 1}.mp4'
+            t = time.perf_counter()
+            index.find(os.path.join(workdir, name), preserve_index=True)
+            lookups.append(time.perf_counter() - t)
+        return {
+            'wall_s': round(build + sum(lookups), 4),
+            'phases': {'index_build': summarize([build]), 'lookup': summarize(lookups)},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def scenario_playlist(spec):
+    """Drive main() over a benchfake playlist with the given CLI flags."""
+    import youtube_downloader as yd
+    server = start_media_server()
+    os.environ['BENCH_MEDIA_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    os.environ['BENCH_MEDIA_SIZE'] = str(spec['media_size'])
+    workdir = tempfile.mkdtemp(prefix='bench-playlist-')
+    target = os.path.join(workdir, 'downloads')
+    try:
+        fill_directory(target, spec.get('files', 0))
+        for i in range(spec.get('already_downloaded', 0)):
+            with open(os.path.join(target, f'Bench clip {i}_{i + 1}.mp4'), 'wb') as f:
+                f.write(b'x')
+
+        # Time the phases by wrapping the module-level functions main() calls
+        timings = {'resolve': [], 'download': []}
+        # download_video() results: True downloaded, None skipped (file exists), False failed
+        outcomes = []
+        first_entry = []
+        run_start = time.perf_counter()
+
+        def timed(name, func):
+            def wrapper(*a, **kw):
+                start = time.perf_counter()
+                if not first_entry:
+                    first_entry.append(start - run_start)
+                try:
+                    return func(*a, **kw)
+                finally:
+                    timings[name].append(time.perf_counter() - start)
+            return wrapper
+
+        yd.resolve_info = timed('resolve', yd.resolve_info)
+        download_video = timed('download', yd.download_video)
+
+        def counted_download(*a, **kw):
+            ok = download_video(*a, **kw)
+            outcomes.append(ok)
+            return ok
+
+        yd.download_video = counted_download
+
+        cli = ['--dir', target, '--video', '--quality', 'best', '--quiet', '--no-archive',
+               '--cache-dir', os.path.join(workdir, 'cache')] + spec['cli']
+        yd.args = yd.build_arg_parser().parse_args(cli)
+        yd.download_path = target
+        url = f"benchfake:playlist:{spec['entries']}"
+        # Answers for the remaining interactive prompts (URL, force, subtitles)
+        sys.stdin = io.StringIO(f'{url}\nN\nN\nN\n')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yd.main()
+        wall = time.perf_counter() - run_start
+        # Skipped entries cost almost nothing; counting them would inflate the throughput
+        downloaded = outcomes.count(True)
+        return {
+            'wall_s': round(wall, 4),
+            'entries_per_s': round(downloaded / wall, 2) if wall else None,
+            'downloaded': downloaded,
+            'skipped': outcomes.count(None),
+            'bytes_per_s': round(server.bytes_served / wall) if wall else None,
+            'bytes_transferred': server.bytes_served,
+            'phases': {
+                'time_to_first_entry_s': round(first_entry[0], 4) if first_entry else None,
+                'resolve': summarize(timings['resolve']),
+                'download': summarize(timings['download']),
+            },
+        }
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+SCENARIO_FUNCS = {
+    'startup': scenario_startup,
+    'dedupe-index': scenario_dedupe_index,
+    'playlist': scenario_playlist,
+    'playlist-existing': scenario_playlist,
+}
+
+
+def run_child(spec_json):
+    spec = json.loads(spec_json)
+    result = SCENARIO_FUNCS[spec['scenario']](spec)
+    result['peak_rss_mb'] = peak_rss_mb()
+    with open(spec['result_path'], 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+# ---------------------------------------------------------------------------
+# Parent: build scenario specs, run each in a subprocess, collect JSON
+# ---------------------------------------------------------------------------
+
+def build_specs(opts):
+    specs = []
+    scenarios = opts.scenarios.split(',') if opts.scenarios else SCENARIOS
+    for name in scenarios:
+        if name == 'startup':
+            specs.append({'scenario': name, 'repeat': opts.startup_runs})
+        elif name == 'dedupe-index':
+            specs.append({'scenario': name, 'files': opts.files, 'entries': opts.entries})
+        elif name == 'playlist':
+            for c in opts.concurrency.split(','):
+                specs.append({'scenario': name, 'entries': opts.entries, 'media_size': opts.media_size,
+                              'cli': ['--concurrency', c] + opts.extra_args})
+        elif name == 'playlist-existing':
+            # Large unrelated folder plus half the playlist already on disk
+            c = opts.concurrency.split(',')[-1]
+            specs.append({'scenario': name, 'entries': opts.entries, 'media_size': opts.media_size,
+                          'files': opts.files, 'already_downloaded': opts.entries // 2,
+                          'cli': ['--concurrency', c] + opts.extra_args})
+        else:
+            raise SystemExit(f'Unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+    return specs
+
+
+def environment():
+    info = {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+    try:
+        import yt_dlp.version
+        info['yt_dlp'] = yt_dlp.version.__version__
+    except ImportError:
+        info['yt_dlp'] = None
+    try:
+        info['revision'] = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR,
+                                          capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info['revision'] = None
+    return info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks for youtube_downloader.py (JSON output)')
+    parser.add_argument('--scenarios', type=str, default=None, help=f'Comma-separated subset of: {", ".join(SCENARIOS)}')
+    parser.add_argument('--entries', type=int, default=None, help='Playlist entries (default 10000)')
+    parser.add_argument('--files', type=int, default=None, help='Pre-existing files in the target folder (default 50000)')
+    parser.add_argument('--media-size', type=int, default=64 * 1024, help='Bytes per synthetic media file (default 65536)')
+    parser.add_argument('--concurrency', type=str, default='1,4,8', help='Comma-separated --concurrency values for the playlist scenario')
+    parser.add_argument('--startup-runs', type=int, default=5, help='Cold starts measured by the startup scenario')
+    parser.add_argument('--quick', action='store_true', help='Smaller defaults (500 entries, 5000 files) for a fast smoke run')
+    parser.add_argument('--output', type=str, default=None, help='Write the JSON report here instead of stdout')
+    parser.add_argument('--run-scenario', type=str, default=None, help=argparse.SUPPRESS)
+    opts, extra = parser.parse_known_args(argv)
+    # Anything unrecognized is passed to youtube_downloader.py (e.g. --prefetch 4)
+    opts.extra_args = extra
+
+    if opts.run_scenario:
+        run_child(opts.run_scenario)
+        return
+    if opts.entries is None:
+        opts.entries = 500 if opts.quick else 10000
+    if opts.files is None:
+        opts.files = 5000 if opts.quick else 50000
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (BENCH_DIR, REPO_DIR, env.get('PYTHONPATH')) if p)
+    report = {'environment': environment(), 'results': []}
+    for spec in build_specs(opts):
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+            spec['result_path'] = tmp.name
+        label = spec['scenario'] + (f" {' '.join(spec['cli'])}" if 'cli' in spec else '')
+        print(f'Running {label}...', file=sys.stderr)
+        try:
+            # Results come back through result_path; the child's own stdout is noise
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--run-scenario', json.dumps(spec)],
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+            with open(spec['result_path'], 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            result = {'error': str(e)}
+        finally:
+            os.remove(spec['result_path'])
+        params = {k: v for k, v in spec.items() if k not in ('scenario', 'result_path')}
+        report['results'].append({'scenario': spec['scenario'], 'params': params, **result})
+
+    output = json.dumps(report, indent=2)
+    if opts.output:
+        with open(opts.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
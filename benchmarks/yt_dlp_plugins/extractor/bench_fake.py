@@ -0,0 +1,53 @@
+# Stand-in extractors for the offline benchmark (benchmarks/bench_downloader.py).
+# yt-dlp loads them as plugins when the benchmarks/ directory is on sys.path.
+# Media URLs point at the harness's localhost server (BENCH_MEDIA_URL).
+import os
+
+from yt_dlp.extractor.common import InfoExtractor
+
+
+def _media_url(video_id):
+    base = os.environ.get('BENCH_MEDIA_URL', 'http://127.0.0.1:8000')
+    size = int(os.environ.get('BENCH_MEDIA_SIZE', '65536'))
+    return f'{base}/media/{size}/{video_id}.mp4'
+
+
+def _duration(index):
+    # Spread of short and long entries so scheduling has something to work with
+    return 30 + (index * 37) % 600
+
+
+class BenchFakePlaylistIE(InfoExtractor):
+    IE_NAME = 'benchfake:playlist'
+    _VALID_URL = r'benchfake:playlist:(?P<count>\d+)'
+
+    def _real_extract(self, url):
+        count = int(self._match_valid_url(url).group('count'))
+        entries = [
+            self.url_result(f'benchfake:video:{i}', BenchFakeVideoIE, video_id=f'bench{i}',
+                            video_title=f'Bench clip {i}', duration=_duration(i))
+            for i in range(count)
+        ]
+        return self.playlist_result(entries, f'benchlist{count}', f'Benchmark playlist ({count})')
+
+
+class BenchFakeVideoIE(InfoExtractor):
+    IE_NAME = 'benchfake:video'
+    _VALID_URL = r'benchfake:video:(?P<id>\d+)'
+
+    def _real_extract(self, url):
+        index = int(self._match_id(url))
+        video_id = f'bench{index}'
+        return {
+            'id': video_id,
+            'title': f'Bench clip {index}',
+            'duration': _duration(index),
+            'formats': [{
+                'format_id': 'mp4',
+                'url': _media_url(video_id),
+                'ext': 'mp4',
+                'vcodec': 'h264',
+                'acodec': 'aac',
+                'filesize': int(os.environ.get('BENCH_MEDIA_SIZE', '65536')),
+            }],
+        }
@@ -0,0 +1,56 @@
+import youtube_downloader as yd
+
+
+def write(path, data=b'data'):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_find_ignores_extension_case_and_index_suffix(tmp_path):
+    write(tmp_path / 'My Video_3.mp4')
+    index = yd.DuplicateIndex(str(tmp_path))
+    assert index.find('my video.webm') == str(tmp_path / 'My Video_3.mp4')
+    assert index.find('My Video (1).mkv') == str(tmp_path / 'My Video_3.mp4')
+    assert index.find('Other Video.mp4') is None
+
+
+def test_preserve_index_matches_the_exact_index(tmp_path):
+    write(tmp_path / 'Clip_2.mp4')
+    index = yd.DuplicateIndex(str(tmp_path))
+    assert index.find('Clip_2.mp4', preserve_index=True) == str(tmp_path / 'Clip_2.mp4')
+    assert index.find('Clip_3.mp4', preserve_index=True) is None
+
+
+def test_empty_files_are_not_duplicates(tmp_path):
+    write(tmp_path / 'Empty.mp4', b'')
+    index = yd.DuplicateIndex(str(tmp_path))
+    assert index.find('Empty.mp4') is None
+    # A later non-empty file with the same name replaces the empty one
+    index.add(write(tmp_path / 'Empty.mkv'))
+    assert index.find('Empty.mp4') == str(tmp_path / 'Empty.mkv')
+
+
+def test_add_and_discard(tmp_path):
+    index = yd.DuplicateIndex(str(tmp_path))
+    path = write(tmp_path / 'Song.mp3')
+    index.add(path)
+    assert index.find('Song.m4a') == path
+    index.discard(path)
+    assert index.find('Song.m4a') is None
+    assert index.find('Song.m4a', preserve_index=True) is None
+
+
+def test_discard_keeps_a_different_file_with_the_same_name(tmp_path):
+    kept = write(tmp_path / 'Song.mp3')
+    index = yd.DuplicateIndex(str(tmp_path))
+    index.discard(str(tmp_path / 'Song.webm'))
+    assert index.find('Song.mp3') == kept
+
+
+def test_snapshot_seeds_an_index_without_a_rescan(tmp_path):
+    write(tmp_path / 'A.mp4')
+    index = yd.DuplicateIndex(str(tmp_path))
+    write(tmp_path / 'B.mp4')
+    copy = yd.DuplicateIndex(str(tmp_path), snapshot=index.snapshot())
+    assert copy.find('A.mp4') is not None
+    assert copy.find('B.mp4') is None
@@ -0,0 +1,76 @@
+import youtube_downloader as yd
+
+
+def make_items(n):
+    return [(idx, {'id': f'v{idx}', 'ie_key': 'Youtube', 'title': f'Clip {idx}', 'duration': 60}, f'https://example.com/{idx}')
+            for idx in range(1, n + 1)]
+
+
+def test_load_returns_unfinished_entries(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = yd.JobJournal(path)
+    journal.start_run('https://example.com/list', 'List')
+    journal.queued(make_items(4))
+    journal.mark(1, 'in-progress')
+    journal.mark(1, 'done')
+    journal.mark(2, 'failed')
+    journal.mark(3, 'in-progress')
+    journal.close()
+
+    run, pending = yd.JobJournal.load(path)
+    assert run['url'] == 'https://example.com/list'
+    assert run['entries'] == 4
+    assert run['unconverted'] == []
+    assert [idx for idx, _, _ in pending] == [2, 3, 4]
+    idx, entry, url = pending[0]
+    assert url == 'https://example.com/2'
+    assert entry.get('title') == 'Clip 2'
+    assert entry.get('ie_key') == 'Youtube'
+    assert not yd.is_resolved(entry)
+
+
+def test_load_lists_downloads_waiting_for_post_processing(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = yd.JobJournal(path)
+    journal.start_run('https://example.com/list', 'List')
+    journal.queued(make_items(2))
+    journal.mark(1, 'postprocessing', files=['/downloads/Clip 1.webm'])
+    journal.mark(2, 'postprocessing', files=['/downloads/Clip 2.webm'])
+    journal.mark(2, 'done')
+    journal.close()
+
+    run, pending = yd.JobJournal.load(path)
+    assert run['unconverted'] == ['/downloads/Clip 1.webm']
+    assert [idx for idx, _, _ in pending] == [1]
+
+
+def test_load_skips_a_torn_last_line(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = yd.JobJournal(path)
+    journal.start_run('https://example.com/list', 'List')
+    journal.queued(make_items(2))
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event":"entry","idx":1,"sta')
+
+    run, pending = yd.JobJournal.load(path)
+    assert [idx for idx, _, _ in pending] == [1, 2]
+
+
+def test_resumed_run_appends_to_the_journal(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = yd.JobJournal(path)
+    journal.start_run('https://example.com/list', 'List', streamed=True)
+    journal.queued(make_items(3))
+    journal.close()
+    run, pending = yd.JobJournal.load(path)
+    assert run.get('streamed') and not run.get('listed')
+
+    journal = yd.JobJournal(path, append=True)
+    journal.mark(1, 'done')
+    journal.listed(3)
+    journal.close()
+    run, pending = yd.JobJournal.load(path)
+    assert run['listed']
+    assert run['entries'] == 3
+    assert [idx for idx, _, _ in pending] == [2, 3]
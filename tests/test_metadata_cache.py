@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import youtube_downloader as yd
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time.time(), advanced by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(yd.time, 'time', lambda: now[0])
+    return now
+
+
+def info(video_id, payload=''):
+    return {'id': video_id, 'title': f'Video {video_id}', 'payload': payload}
+
+
+def test_put_and_get(tmp_path, clock):
+    cache = yd.MetadataCache(str(tmp_path / 'cache' / 'metadata.sqlite'))
+    assert cache.get('youtube a') is None
+    cache.put('youtube a', info('a'))
+    assert cache.get('youtube a')['title'] == 'Video a'
+    cache.close()
+
+
+def test_records_persist_across_instances(tmp_path, clock):
+    path = str(tmp_path / 'metadata.sqlite')
+    cache = yd.MetadataCache(path)
+    cache.put('youtube a', info('a'))
+    cache.close()
+    cache = yd.MetadataCache(path)
+    assert cache.get('youtube a')['id'] == 'a'
+    cache.close()
+
+
+def test_expired_records_are_misses(tmp_path, clock):
+    cache = yd.MetadataCache(str(tmp_path / 'metadata.sqlite'), ttl=60)
+    cache.put('youtube a', info('a'))
+    clock[0] += 59
+    assert cache.get('youtube a') is not None
+    clock[0] += 2
+    assert cache.get('youtube a') is None
+    cache.close()
+
+
+def test_least_recently_used_records_are_evicted(tmp_path, clock):
+    cache = yd.MetadataCache(str(tmp_path / 'metadata.sqlite'))
+    # Incompressible payloads, so every record has about the same size
+    cache.put('youtube a', info('a', os.urandom(2000).hex()))
+    one_record = cache._total
+    cache.max_bytes = int(one_record * 2.5)
+    clock[0] += 1
+    cache.put('youtube b', info('b', os.urandom(2000).hex()))
+    clock[0] += 1
+    assert cache.get('youtube a') is not None
+    clock[0] += 1
+    cache.put('youtube c', info('c', os.urandom(2000).hex()))
+    assert cache.get('youtube b') is None
+    assert cache.get('youtube a') is not None
+    assert cache.get('youtube c') is not None
+    assert cache._total <= cache.max_bytes
+    cache.close()
+
+
+def test_database_errors_are_misses(tmp_path, clock):
+    cache = yd.MetadataCache(str(tmp_path / 'metadata.sqlite'))
+    cache.put('youtube a', info('a'))
+    cache._db.close()
+    assert cache.get('youtube a') is None
+    cache.put('youtube b', info('b'))
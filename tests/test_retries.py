@@ -0,0 +1,76 @@
+import pytest
+
+import youtube_downloader as yd
+
+
+class StatusError(Exception):
+    def __init__(self, status, msg='request failed'):
+        super().__init__(msg)
+        self.status = status
+
+
+@pytest.mark.parametrize('error, kind', [
+    (StatusError(429), 'throttled'),
+    (StatusError(503), 'transient'),
+    (StatusError(404), 'permanent'),
+    (TimeoutError('read timed out'), 'transient'),
+    (Exception('ERROR: [download] Got error: HTTP Error 502: Bad Gateway'), 'transient'),
+    (Exception('ERROR: [youtube] abc: Video unavailable'), 'permanent'),
+])
+def test_classify_failure(error, kind):
+    assert yd.classify_failure(error)[0] == kind
+
+
+def test_classify_failure_follows_the_exception_chain():
+    try:
+        try:
+            raise StatusError(429)
+        except StatusError as e:
+            raise RuntimeError('extraction failed') from e
+    except RuntimeError as e:
+        error = e
+    assert yd.classify_failure(error) == ('throttled', 'extraction failed')
+
+
+def test_classify_failure_strips_the_ytdlp_prefix():
+    error = Exception('ERROR: \r[download] Got error: HTTP Error 503: Service Unavailable')
+    assert yd.classify_failure(error) == ('transient', 'HTTP Error 503: Service Unavailable')
+
+
+def test_backoff_doubles_with_jitter_and_is_capped():
+    retries = yd.RetryQueue(attempts=5, backoff=4.0, max_delay=10.0, cooldown=0)
+    for step in (4.0, 8.0, 10.0, 10.0):
+        delay = retries.failed(1, 'Clip', 'https://example.com/1', 'transient', 'HTTP Error 503')
+        assert step / 2 <= delay <= step
+
+
+def test_no_retry_when_permanent_or_out_of_attempts():
+    retries = yd.RetryQueue(attempts=1, backoff=1.0)
+    assert retries.failed(1, 'Gone', 'https://example.com/1', 'permanent', 'Video unavailable') is None
+    assert retries.failed(2, 'Flaky', 'https://example.com/2', 'transient', 'timed out') is not None
+    assert retries.failed(2, 'Flaky', 'https://example.com/2', 'transient', 'timed out') is None
+    assert retries.failed(3, 'Flaky', 'https://example.com/3', 'transient', 'timed out', retry=False) is None
+    assert retries.tries(2) == 2
+    assert retries.retried == 1
+
+
+def test_throttling_cools_down_the_host():
+    retries = yd.RetryQueue(attempts=3, backoff=1.0, max_delay=300.0, cooldown=60.0)
+    assert retries.failed(1, 'A', 'https://example.com/1', 'throttled', 'HTTP Error 429') >= 59
+    # Other entries on the same host wait out the cool-down too; other hosts don't
+    assert retries.failed(2, 'B', 'https://example.com/2', 'transient', 'timed out') >= 59
+    assert retries.failed(3, 'C', 'https://other.example/3', 'transient', 'timed out') <= 1.0
+    # A second strike doubles the cool-down
+    assert retries.failed(1, 'A', 'https://example.com/1', 'throttled', 'HTTP Error 429') >= 119
+
+
+def test_exit_code():
+    retries = yd.RetryQueue()
+    assert retries.exit_code() == yd.EXIT_OK
+    retries.failed(1, 'A', 'https://example.com/1', 'transient', 'timed out')
+    assert retries.exit_code() == yd.EXIT_RETRY_LATER
+    retries.failed(2, 'B', 'https://example.com/2', 'permanent', 'Video unavailable')
+    assert retries.exit_code() == yd.EXIT_FAILED_ENTRIES
+    retries.succeeded(2, 'https://example.com/2')
+    retries.succeeded(1, 'https://example.com/1')
+    assert retries.exit_code() == yd.EXIT_OK
@@ -0,0 +1,75 @@
+import youtube_downloader as yd
+
+
+def items(*entries):
+    return [(idx, entry, f'https://example.com/{idx}') for idx, entry in enumerate(entries, start=1)]
+
+
+def order(scheduled):
+    return [idx for idx, _, _ in scheduled]
+
+
+def test_longest_first_and_shortest_first():
+    listed = items({'duration': 60}, {'filesize': 300}, {'duration': 600})
+    scheduled, known, total = yd.schedule_entries(listed, 'longest', bytes_per_second=10)
+    assert order(scheduled) == [3, 1, 2]
+    assert known == 3
+    assert total == 600 + 300 + 6000
+    scheduled, _, _ = yd.schedule_entries(listed, 'shortest', bytes_per_second=10)
+    assert order(scheduled) == [2, 1, 3]
+
+
+def test_playlist_order_is_kept():
+    listed = items({'duration': 60}, {'duration': 600})
+    scheduled, _, _ = yd.schedule_entries(listed, 'playlist', bytes_per_second=10)
+    assert order(scheduled) == [1, 2]
+
+
+def test_unknown_sizes_count_as_the_median_and_ties_keep_listing_order():
+    listed = items({'duration': 100}, {}, {'duration': 10}, {'duration': 50}, {})
+    scheduled, known, total = yd.schedule_entries(listed, 'longest', bytes_per_second=1)
+    assert known == 3
+    assert total == 100 + 50 + 10 + 50 + 50
+    assert order(scheduled) == [1, 2, 4, 5, 3]
+
+
+def test_nothing_known_keeps_listing_order():
+    listed = items({}, {}, {})
+    scheduled, known, _ = yd.schedule_entries(listed, 'longest', bytes_per_second=1)
+    assert order(scheduled) == [1, 2, 3]
+    assert known == 0
+
+
+def test_fragment_budget_share():
+    slots, remaining = [4], [10]
+    budget = yd.FragmentBudget(8, lambda: slots[0], lambda: remaining[0])
+    assert budget.share() == 2
+    # The last entries fan out over the whole budget
+    remaining[0] = 2
+    assert budget.share() == 4
+    remaining[0] = 1
+    assert budget.share() == 8
+    remaining[0] = 0
+    assert budget.share() == 8
+    # Never less than one stream, even with more slots than streams
+    slots[0], remaining[0] = 16, 16
+    assert budget.share() == 1
+
+
+class FakeYDL:
+    def __init__(self, **params):
+        self.params = params
+
+
+def test_fragment_budget_lease_grants_and_restores():
+    budget = yd.FragmentBudget(6, lambda: 2, lambda: 5)
+    first, second = FakeYDL(), FakeYDL(concurrent_fragment_downloads=1)
+    with budget.lease(first) as granted:
+        assert granted == 3
+        assert first.params['concurrent_fragment_downloads'] == 3
+        with budget.lease(second) as granted:
+            assert granted == 3
+            assert budget.in_use == 6
+    assert budget.in_use == 0
+    assert 'concurrent_fragment_downloads' not in first.params
+    assert second.params['concurrent_fragment_downloads'] == 1
@@ -1,31 +1,79 @@
+import time
+# Module load start, reported by --startup-report
+_MODULE_T0 = time.perf_counter()
 import os
 import sys
-import subprocess
-import time
+import importlib
+import importlib.util
 import json
 import re
 import shutil
+import stat
 import threading
 import itertools
-import concurrent.futures
-from yt_dlp import YoutubeDL
-from colorama import init, Fore, Style
-import psutil
+import contextlib
+import queue
+import io
+import random
+import urllib.parse
 import argparse
-import platform
 
-# Auto-install dependencies if missing
+# Required packages (pip name -> import name)
+REQUIRED_PACKAGES = {'yt-dlp': 'yt_dlp', 'colorama': 'colorama', 'psutil': 'psutil'}
+
+# Cold-start budget for `--help` (interpreter start to exit), checked by --startup-report
+STARTUP_BUDGET_MS = 150
+
+# Install missing dependencies. Not run on every start any more: it happens when a
+# dependency first fails to import, or explicitly with --install-deps.
 def install_dependencies():
-    required = ['yt-dlp', 'colorama', 'psutil']
-    missing = []
-    for pkg in required:
-        try:
-            __import__(pkg.replace('-', '_'))
-        except ImportError:
-            missing.append(pkg)
+    missing = [pkg for pkg, module in REQUIRED_PACKAGES.items() if importlib.util.find_spec(module) is None]
     if missing:
-        print(Fore.YELLOW + f"Installing missing packages: {', '.join(missing)}" + Style.RESET_ALL)
+        print(f"Installing missing packages: {', '.join(missing)}")
         subprocess.check_call([sys.executable, '-m', 'pip', 'install'] + missing)
+        importlib.invalidate_caches()
+    return missing
+
+
+def import_dependency(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        install_dependencies()
+        return importlib.import_module(name)
+
+
+class _LazyModule:
+    """Imports a module on first attribute access. yt-dlp alone takes a large
+    share of a cold start, so runs that never reach it (--help, argument
+    errors) don't pay for it."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = import_dependency(self._name)
+        return getattr(self._module, attr)
+
+
+yt_dlp = _LazyModule('yt_dlp')
+yt_dlp_postprocessor = _LazyModule('yt_dlp.postprocessor')
+psutil = _LazyModule('psutil')
+# Standard modules only some modes use (playlist runs, the cache, process workers); together
+# they cost about as much as the rest of the start-up
+asyncio = _LazyModule('asyncio')
+concurrent_futures = _LazyModule('concurrent.futures')
+multiprocessing = _LazyModule('multiprocessing')
+subprocess = _LazyModule('subprocess')
+sqlite3 = _LazyModule('sqlite3')
+hashlib = _LazyModule('hashlib')
+zlib = _LazyModule('zlib')
+heapq = _LazyModule('heapq')
+# colorama is cheap and used by nearly every message, so it is imported eagerly
+_colorama = import_dependency('colorama')
+Fore, Style, Cursor = _colorama.Fore, _colorama.Style, _colorama.Cursor
 
 # Adjust download path for Windows compatibility
 def get_download_path():
@@ -35,6 +83,81 @@ def get_download_path():
     return prompt_with_default("Enter download folder", default_path)
 
 
+# Default name of the download archive kept in the download folder
+ARCHIVE_FILENAME = '.download_archive.txt'
+
+# Journal of the current playlist run (for --resume), kept in the download folder
+JOURNAL_FILENAME = '.download_journal.jsonl'
+JOURNAL_SYNC_EVERY = 50
+JOURNAL_SYNC_SECONDS = 2.0
+
+# Metadata cache defaults: format URLs typically expire after a few hours, so
+# cached info is only trusted for an hour unless --cache-ttl says otherwise
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'youtube_downloader')
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_CACHE_SIZE_MB = 100
+# How long a cache read/write waits on another process's lock before giving up (a miss)
+CACHE_BUSY_TIMEOUT_MS = 2000
+
+# --concurrency auto: start slots, sampling interval (seconds) and thresholds
+AUTO_CONCURRENCY_START = 2
+AUTO_CONCURRENCY_INTERVAL = 5.0
+AUTO_MIN_GAIN = 0.10
+AUTO_HOLD_INTERVALS = 3
+AUTO_CPU_HIGH = 90
+AUTO_DISK_HIGH = 90
+
+# --stream-listing: playlist entries listed ahead of the downloads (bounded queue)
+STREAM_QUEUE_SIZE = 64
+# Entries read per getslice() call from a paged listing whose page size is unknown
+STREAM_SLICE_SIZE = 50
+
+# --batch: sources listed in parallel
+BATCH_LISTING_WORKERS = 4
+
+# Failed entries: transient failures (throttling, network blips) are retried up
+# to RETRY_ATTEMPTS more times after a jittered exponential backoff starting at
+# RETRY_BACKOFF seconds; throttling also cools its host down for HOST_COOLDOWN
+# seconds, doubled on every further strike
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 5.0
+RETRY_MAX_DELAY = 300.0
+HOST_COOLDOWN = 30.0
+# Exit codes: the run could not start, some entries failed for good, or only
+# transient failures are left (EX_TEMPFAIL: try again later)
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_FAILED_ENTRIES = 2
+EXIT_RETRY_LATER = 75
+
+# --memory-limit: how often (seconds) the process RSS is sampled
+MEMORY_CHECK_INTERVAL = 0.5
+
+# --schedule: download order of playlist entries, and the bitrates (bytes per
+# second) used to estimate an entry's size from its duration when the listing
+# has no filesize
+SCHEDULE_POLICIES = ('playlist', 'longest', 'shortest')
+ESTIMATED_BYTES_PER_SECOND = {'video': 375_000, 'audio': 16_000}
+
+# Metrics export: Prometheus metric name prefix, histogram buckets (seconds) and
+# default rewrite interval of the textfile
+METRICS_PREFIX = 'youtube_downloader'
+METRICS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+METRICS_INTERVAL = 15.0
+
+# serve mode: default listen address and the size of its persistent download pool
+SERVE_DEFAULT_LISTEN = '127.0.0.1:8750'
+SERVE_WORKERS = 8
+# Pooled YoutubeDL instances kept per daemon thread; each job's options (its directory
+# included) key its own, so older ones are closed least recently used first
+SERVE_YDL_INSTANCES = 4
+# CLI options a job may not set (they belong to the daemon or need a terminal)
+SERVE_DAEMON_OPTIONS = {'serve', 'listen', 'socket', 'serve_workers', 'install_deps', 'startup_report',
+                        'metrics_jsonl', 'metrics_prom', 'metrics_interval', 'progress_rate', 'cache_dir'}
+# Path options a job may set, confined to the daemon's --dir (relative paths start there)
+SERVE_JOB_PATHS = ('dir', 'batch', 'failure_report', 'archive_file')
+SERVE_LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
 # Previously, the script used a JSON DB to track downloaded videos.
 # You requested a simpler approach: just check whether the expected output file
 # exists on disk before attempting a download. All DB and maintenance functions
@@ -76,47 +199,1986 @@ def normalized_basename(s: str, strip_index=True) -> str:
 # Remove complex duplicate logic — the script will simply check whether the
 # prepared output filename exists on disk before attempting a download.
 
+class DuplicateIndex:
+    """In-memory index of the files already present in the download folder.
+
+    The folder is scanned once and every file is keyed by its normalized base
+    name (both with and without trailing index suffixes), so duplicate checks
+    are dictionary lookups instead of a directory rescan per video. Workers add
+    files as downloads finish; all access is guarded by a lock."""
+
+    def __init__(self, path, snapshot=None):
+        self.path = path
+        self._lock = threading.Lock()
+        # strip_index flag -> {normalized base: (path, size)}
+        self._names = {True: {}, False: {}}
+        if snapshot is not None:
+            self._names = {True: dict(snapshot[True]), False: dict(snapshot[False])}
+        else:
+            self.rebuild()
+
+    def snapshot(self):
+        """Copy of the index contents, e.g. to seed worker processes without a rescan."""
+        with self._lock:
+            return {True: dict(self._names[True]), False: dict(self._names[False])}
+
+    def rebuild(self):
+        names = {True: {}, False: {}}
+        try:
+            with metrics.phase('scan', path=self.path), os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        size = entry.stat().st_size
+                    except OSError:
+                        continue
+                    self._store(names, entry.path, entry.name, size)
+        except OSError:
+            pass
+        with self._lock:
+            self._names = names
+
+    @staticmethod
+    def _store(names, fpath, fname, size):
+        base = filename_without_ext(fname)
+        for strip_index in (True, False):
+            norm = normalized_basename(base, strip_index=strip_index)
+            current = names[strip_index].get(norm)
+            # Keep the first non-empty file seen for a name
+            if current is None or current[1] == 0:
+                names[strip_index][norm] = (fpath, size)
+
+    def add(self, fpath):
+        """Record a file that appeared after the initial scan (e.g. a finished download)."""
+        try:
+            size = os.path.getsize(fpath)
+        except OSError:
+            return
+        with self._lock:
+            self._store(self._names, fpath, os.path.basename(fpath), size)
+
+    def discard(self, fpath):
+        """Forget a file that was deleted (e.g. a download whose conversion failed)."""
+        fpath = os.path.abspath(fpath)
+        base = filename_without_ext(os.path.basename(fpath))
+        with self._lock:
+            for strip_index in (True, False):
+                norm = normalized_basename(base, strip_index=strip_index)
+                current = self._names[strip_index].get(norm)
+                if current is not None and os.path.abspath(current[0]) == fpath:
+                    del self._names[strip_index][norm]
+
+    def find(self, prepared, preserve_index=False):
+        """Return the path of a non-empty file matching `prepared`, or None."""
+        prepared_norm = normalized_basename(filename_without_ext(prepared), strip_index=not preserve_index)
+        with self._lock:
+            match = self._names[not preserve_index].get(prepared_norm)
+        if match and match[1] > 0:
+            return match[0]
+        return None
+
+
+def archive_key(info):
+    """Return the archive key ('<extractor> <id>') for an info or flat entry dict.
+    Uses the same line format as yt-dlp's --download-archive files."""
+    if not info:
+        return None
+    extractor = info.get('extractor_key') or info.get('ie_key')
+    video_id = info.get('id')
+    if not extractor or not video_id:
+        return None
+    return f"{extractor.lower()} {video_id}"
+
+
+class DownloadArchive:
+    """Persistent record of finished downloads, keyed by extractor and video ID.
+
+    Stored as an append-only text file (one key per line) so entries that were
+    already downloaded can be dropped straight from the flat playlist listing,
+    without a metadata request per video."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._keys = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self._keys.add(line)
+
+    def __contains__(self, info):
+        key = archive_key(info)
+        if key is None:
+            return False
+        with self._lock:
+            return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, info):
+        key = archive_key(info)
+        if key is None:
+            return
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(key + '\n')
+
+
+class MetadataCache:
+    """On-disk cache of extract_info results.
+
+    Records are zlib-compressed JSON in a SQLite file, addressed by a hash of
+    their key (a playlist URL or '<extractor> <id>'). Records older than `ttl`
+    seconds are ignored because they carry expiring format URLs; when the
+    total size exceeds `max_bytes` the least recently used records are
+    evicted. A database error (locked, corrupt, disk full) is a miss on get
+    and a no-op on put, so the cache never fails a download."""
+
+    def __init__(self, path, ttl=DEFAULT_CACHE_TTL, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute(f'PRAGMA busy_timeout={CACHE_BUSY_TIMEOUT_MS}')
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS info ('
+            'key TEXT PRIMARY KEY, created REAL, accessed REAL, size INTEGER, data BLOB)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS info_accessed ON info (accessed)')
+        self._total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM info').fetchone()[0]
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached info for `key`, or None if missing or expired."""
+        digest = self._digest(key)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute('SELECT created, data FROM info WHERE key = ?', (digest,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[0] > self.ttl:
+                    return None
+                self._db.execute('UPDATE info SET accessed = ? WHERE key = ?', (now, digest))
+            except sqlite3.Error:
+                return None
+        try:
+            return json.loads(zlib.decompress(row[1]))
+        except (zlib.error, ValueError):
+            return None
+
+    def put(self, key, info):
+        try:
+            data = zlib.compress(json.dumps(yt_dlp.YoutubeDL.sanitize_info(info), separators=(',', ':')).encode('utf-8'))
+        except (TypeError, ValueError):
+            return
+        digest = self._digest(key)
+        now = time.time()
+        with self._lock:
+            try:
+                old = self._db.execute('SELECT size FROM info WHERE key = ?', (digest,)).fetchone()
+                self._db.execute('INSERT OR REPLACE INTO info VALUES (?, ?, ?, ?, ?)', (digest, now, now, len(data), data))
+                self._total += len(data) - (old[0] if old else 0)
+                if self._total > self.max_bytes:
+                    self._evict()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self):
+        # Drop least recently used records (expired ones first) until under the size cap
+        expired = time.time() - self.ttl
+        self._db.execute('DELETE FROM info WHERE created < ?', (expired,))
+        self._total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM info').fetchone()[0]
+        rows = self._db.execute('SELECT key, size FROM info ORDER BY accessed').fetchall()
+        for key, size in rows:
+            if self._total <= self.max_bytes:
+                break
+            self._db.execute('DELETE FROM info WHERE key = ?', (key,))
+            self._total -= size
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class EntryRecord:
+    """Compact playlist entry: only what is needed to queue, journal, archive,
+    schedule and name one download. A flat listing entry dict is several
+    times larger, and a resolved one carries the whole format list.
+
+    Reads like the entry dict it replaces (get() and [] by key). It is a URL
+    reference, never is_resolved(), so the full info is fetched when the
+    entry reaches the metadata stage and dropped once it has downloaded."""
+
+    __slots__ = ('id', 'url', 'title', 'duration', 'ie_key', 'filesize_approx', 'dl_index', 'batch_source')
+    _type = 'url'
+
+    def __init__(self, entry, url):
+        self.id = entry.get('id')
+        self.url = url
+        self.title = entry.get('title')
+        self.duration = entry.get('duration')
+        self.ie_key = entry.get('ie_key') or entry.get('extractor_key')
+        self.filesize_approx = entry.get('filesize') or entry.get('filesize_approx')
+        self.dl_index = entry.get('dl_index')
+        self.batch_source = entry.get('batch_source')
+
+    def get(self, key, default=None):
+        value = getattr(self, key) if key in self.__slots__ or key == '_type' else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+class JobJournal:
+    """Append-only JSON Lines journal of a playlist run.
+
+    The first line describes the run (URL, title); every entry is then logged
+    as queued, in-progress, postprocessing (downloaded, waiting for the
+    post-processing pool), done or failed. Writes are fsync'ed in batches, so
+    after a crash at most the last batch of state changes is lost and those
+    entries are simply retried by --resume."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._pending = 0
+        self._last_sync = time.time()
+
+    def _write(self, record, sync=False):
+        with self._lock:
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._pending += 1
+            if sync or self._pending >= JOURNAL_SYNC_EVERY or time.time() - self._last_sync >= JOURNAL_SYNC_SECONDS:
+                self._sync()
+
+    def _sync(self):
+        # Caller holds _lock
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.time()
+
+    def start_run(self, url, title, streamed=False, sources=None):
+        record = {'event': 'run', 'url': url, 'title': title, 'time': time.time()}
+        if streamed:
+            # Entries are journaled as the listing pages in; 'listed' marks the end
+            record['streamed'] = True
+        if sources:
+            # --batch: the source URLs, referenced by each entry's batch_source
+            record['sources'] = sources
+        self._write(record, sync=True)
+
+    def queued(self, items, sync=True):
+        for idx, entry, entry_url in items:
+            record = {'event': 'entry', 'idx': idx, 'state': 'queued', 'url': entry_url,
+                      'id': entry.get('id'), 'ie_key': entry.get('ie_key') or entry.get('extractor_key'),
+                      'title': entry.get('title'), 'duration': entry.get('duration')}
+            for key in ('dl_index', 'batch_source'):
+                if entry.get(key) is not None:
+                    record[key] = entry[key]
+            self._write(record)
+        if sync:
+            with self._lock:
+                self._sync()
+
+    def listed(self, count):
+        self._write({'event': 'listed', 'count': count}, sync=True)
+
+    def mark(self, idx, state, files=None):
+        record = {'event': 'entry', 'idx': idx, 'state': state}
+        if files:
+            record['files'] = files
+        self._write(record)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    @staticmethod
+    def load(path):
+        """Read a journal; returns (run record, [(idx, entry, url)] of unfinished entries).
+        The run record's 'entries' is how many entries the run journaled, and
+        'unconverted' lists the downloads whose post-processing never finished;
+        they are deleted and fetched again on resume."""
+        run = None
+        entries = {}
+        states = {}
+        files = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash
+                    continue
+                if record.get('event') == 'run':
+                    run = record
+                elif record.get('event') == 'listed' and run is not None:
+                    run['listed'] = True
+                elif record.get('event') == 'entry':
+                    idx = record['idx']
+                    if 'url' in record:
+                        entries[idx] = record
+                    states[idx] = record['state']
+                    files[idx] = record.get('files')
+        if run is not None:
+            run['entries'] = len(entries)
+            run['unconverted'] = [path for idx, state in states.items() if state == 'postprocessing' for path in files[idx] or ()]
+        pending = []
+        for idx in sorted(entries):
+            if states.get(idx) == 'done':
+                continue
+            record = entries[idx]
+            pending.append((idx, EntryRecord(record, record['url']), record['url']))
+        return run, pending
+
+
+def remove_partial_files(path, prefix=None):
+    """Delete leftover partial downloads (.part, .ytdl and fragment files); returns how many.
+    With `prefix`, only files whose name starts with it (one entry's files)."""
+    removed = 0
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return 0
+    for name in names:
+        if prefix is not None and not name.startswith(prefix):
+            continue
+        if name.endswith(('.part', '.ytdl')) or '.part-Frag' in name:
+            try:
+                os.remove(os.path.join(path, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def remove_unconverted(paths, dup_index=None):
+    """Delete downloads whose post-processing failed or was cut off, so the next
+    run fetches them again instead of skipping them; returns how many."""
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+        if dup_index is not None:
+            dup_index.discard(path)
+    return removed
+
+
+class _Phase:
+    __slots__ = ('metrics', 'name', 'fields', 't0')
+
+    def __init__(self, metrics, name, fields):
+        self.metrics = metrics
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0, **self.fields)
+        return False
+
+
+class Metrics:
+    """Per-phase timings, counters and transferred bytes of a run.
+
+    Phase durations go into one histogram per phase and, with a JSON Lines path,
+    into one event line each. The Prometheus textfile is rewritten every
+    `interval` seconds and at the end of the run. While disabled (the default)
+    phase() returns a shared no-op context manager and count() returns at once.
+    In worker processes `forward` sends observations to the parent instead."""
+
+    _NOOP = contextlib.nullcontext()
+
+    def __init__(self):
+        self.enabled = False
+        self._forward = None
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._jsonl = None
+        self._prom_path = None
+        self._interval = METRICS_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+
+    def configure(self, jsonl_path=None, prom_path=None, interval=METRICS_INTERVAL, forward=None):
+        self._forward = forward
+        self._prom_path = prom_path
+        self._interval = interval
+        if jsonl_path:
+            self._jsonl = open(jsonl_path, 'a', encoding='utf-8')
+        self.enabled = bool(forward or jsonl_path or prom_path)
+
+    def phase(self, name, **fields):
+        """Context manager timing one phase; `fields` only go to the JSON Lines event."""
+        if not self.enabled:
+            return self._NOOP
+        return _Phase(self, name, fields)
+
+    def observe(self, name, seconds, **fields):
+        if not self.enabled:
+            return
+        if self._forward is not None:
+            self._forward(('phase', name, seconds, fields))
+            return
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = {'buckets': [0] * len(METRICS_BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(METRICS_BUCKETS):
+                if seconds <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += seconds
+            hist['count'] += 1
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps(dict(fields, event='phase', phase=name, seconds=round(seconds, 6), time=time.time()),
+                                             separators=(',', ':'), default=str) + '\n')
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        if self._forward is not None:
+            self._forward(('count', name, value, labels))
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record(self, message):
+        """Apply an observation forwarded from a worker process."""
+        kind, name, value, fields = message
+        if kind == 'phase':
+            self.observe(name, value, **fields)
+        else:
+            self.count(name, value, **fields)
+
+    def start(self):
+        if self.enabled and self._forward is None and self._interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='metrics-export', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+        if self._prom_path:
+            self.write_prometheus(self._prom_path)
+
+    def stop(self):
+        """Final export: a summary event, the textfile, and close the JSON Lines file."""
+        if not self.enabled or self._forward is not None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._jsonl is not None:
+                summary = {'event': 'summary', 'time': time.time(),
+                           'phases': {name: {'count': h['count'], 'seconds': round(h['sum'], 6)} for name, h in self._histograms.items()},
+                           'counters': [dict(labels, name=name, value=value) for (name, labels), value in self._counters.items()]}
+                self._jsonl.write(json.dumps(summary, separators=(',', ':')) + '\n')
+        self.flush()
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+    def write_prometheus(self, path):
+        """Write the textfile-collector format atomically (node_exporter may read it at any time)."""
+        lines = []
+        with self._lock:
+            histograms = {name: dict(h, buckets=list(h['buckets'])) for name, h in self._histograms.items()}
+            counters = dict(self._counters)
+        if histograms:
+            metric = f"{METRICS_PREFIX}_phase_seconds"
+            lines += [f"# HELP {metric} Time spent in each phase of a download.", f"# TYPE {metric} histogram"]
+            for name, h in sorted(histograms.items()):
+                for bound, n in zip(METRICS_BUCKETS, h['buckets']):
+                    lines.append(f'{metric}_bucket{{phase="{name}",le="{bound}"}} {n}')
+                lines.append(f'{metric}_bucket{{phase="{name}",le="+Inf"}} {h["count"]}')
+                lines.append(f'{metric}_sum{{phase="{name}"}} {h["sum"]:.6f}')
+                lines.append(f'{metric}_count{{phase="{name}"}} {h["count"]}')
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{METRICS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp, path)
+        except OSError as e:
+            print(Fore.YELLOW + f"Could not write metrics to {path}: {e}" + Style.RESET_ALL)
+
+
+# Run-wide metrics; enabled by --metrics-jsonl / --metrics-prom
+metrics = Metrics()
+
+
+class YDLPool:
+    """Long-lived YoutubeDL instances, one per worker thread and per option set.
+
+    Constructing a YoutubeDL re-initializes extractors, the HTTP opener and the
+    cookie jar, so reusing one instance for both info extraction and download
+    keeps its connection pool (and warm extractors) across playlist entries.
+    Instances are not shared between threads because YoutubeDL is not
+    thread-safe.
+
+    With `rebind_hooks` (serve mode) instances outlive the run that created
+    them: progress and post hooks are left out of the key and each instance
+    calls whatever hooks the last get() on its thread passed in. With
+    `max_per_thread`, a thread's least recently used instance is closed once
+    it holds more than that many."""
+
+    HOOK_OPTS = ('progress_hooks', 'post_hooks')
+
+    def __init__(self, rebind_hooks=False, max_per_thread=None):
+        self.rebind_hooks = rebind_hooks
+        self.max_per_thread = max_per_thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []
+
+    @staticmethod
+    def _key(opts):
+        # Hooks and other callables are keyed by identity through repr()
+        return json.dumps(opts, sort_keys=True, default=repr)
+
+    def get(self, opts):
+        cache = getattr(self._local, 'instances', None)
+        if cache is None:
+            cache = self._local.instances = {}
+            self._local.hooks = {}
+        hooks = None
+        if self.rebind_hooks:
+            hooks = {name: list(opts.get(name) or []) for name in self.HOOK_OPTS}
+            opts = {k: v for k, v in opts.items() if k not in self.HOOK_OPTS}
+        key = self._key(opts)
+        # Re-inserted on every get, so the dict runs from least to most recently used
+        ydl = cache.pop(key, None)
+        if ydl is None:
+            if hooks is not None:
+                opts = dict(opts, **{name: [self._hook_caller(name, key)] for name in self.HOOK_OPTS})
+            ydl = yt_dlp.YoutubeDL(dict(opts))
+            with self._lock:
+                self._instances.append(ydl)
+        cache[key] = ydl
+        if hooks is not None:
+            self._local.hooks[key] = hooks
+        while self.max_per_thread and len(cache) > self.max_per_thread:
+            self._evict(next(iter(cache)))
+        return ydl
+
+    def _evict(self, key):
+        ydl = self._local.instances.pop(key)
+        self._local.hooks.pop(key, None)
+        with self._lock:
+            self._instances.remove(ydl)
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def _hook_caller(self, name, key):
+        # Hooks run on the thread that owns the instance, so its current hooks are thread-local
+        def call(arg):
+            for hook in self._local.hooks[key][name]:
+                hook(arg)
+        return call
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+
+
+def is_resolved(info):
+    """True when `info` is a full video info dict that can be downloaded directly
+    (flat playlist entries are only URL references)."""
+    return bool(info) and info.get('_type', 'video') == 'video' and bool(info.get('formats') or info.get('url'))
+
+
+class DownloadSlot:
+    """Byte counters of the download running on one worker thread.
+    Only that thread writes to it, so updates need no lock."""
+    __slots__ = ('title', 'downloaded', 'total', 'speed', 'completed_bytes')
+
+    def __init__(self):
+        self.title = ''
+        self.downloaded = 0
+        self.total = 0
+        self.speed = 0
+        self.completed_bytes = 0
+
+
+class _StatusStream:
+    """stdout wrapper that erases the live progress block before any other output,
+    so regular messages scroll above it instead of being drawn over."""
+
+    def __init__(self, renderer, stream):
+        self._renderer = renderer
+        self._stream = stream
+
+    def write(self, s):
+        with self._renderer._draw_lock:
+            self._renderer._erase()
+            if s:
+                self._renderer._at_line_start = s.endswith('\n')
+            return self._stream.write(s)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ProgressRenderer:
+    """Aggregate progress display for all running downloads.
+
+    yt-dlp progress hooks only store counters in the calling thread's
+    DownloadSlot; a single renderer thread redraws total throughput, one bar
+    per active slot and an overall ETA at a fixed rate. In quiet mode no
+    thread is started and the hook returns immediately."""
+
+    def __init__(self, progress_state, rate=4.0, quiet=False):
+        self.state = progress_state
+        self.interval = 1.0 / max(0.1, rate)
+        self.quiet = quiet
+        # Byte counters are still kept in quiet mode when something else reads them
+        self.count_bytes = False
+        # Optional callable returning an extra status line (e.g. the post-processing stage)
+        self.extra_status = None
+        self._slots = {}
+        self._slots_lock = threading.Lock()
+        self._draw_lock = threading.RLock()
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stream = sys.stdout
+        self._tty = hasattr(self._stream, 'isatty') and self._stream.isatty()
+        self._lines = 0
+        self._at_line_start = True
+        self._last_bytes = 0
+        self._last_time = time.time()
+        self._last_plain = 0
+        self.throughput = 0.0
+
+    def _slot(self, key=None):
+        if key is not None:
+            # Downloads reported from elsewhere (e.g. worker processes) get a slot per key
+            with self._slots_lock:
+                slot = self._slots.get(key)
+                if slot is None:
+                    slot = self._slots[key] = DownloadSlot()
+            return slot
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            slot = self._local.slot = DownloadSlot()
+            with self._slots_lock:
+                self._slots[threading.get_ident()] = slot
+        return slot
+
+    def hook(self, d, key=None):
+        if self.quiet and not self.count_bytes:
+            return
+        status = d.get('status')
+        slot = self._slot(key)
+        if status == 'downloading':
+            slot.title = (d.get('info_dict') or {}).get('title') or os.path.basename(d.get('filename', ''))
+            slot.downloaded = d.get('downloaded_bytes') or 0
+            slot.total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            slot.speed = d.get('speed') or 0
+        elif status in ('finished', 'error'):
+            slot.completed_bytes += d.get('downloaded_bytes') or d.get('total_bytes') or slot.downloaded
+            slot.title = ''
+            slot.downloaded = slot.total = slot.speed = 0
+
+    def start(self):
+        if self.quiet or self._thread is not None:
+            return
+        if self._tty:
+            sys.stdout = _StatusStream(self, self._stream)
+        self._thread = threading.Thread(target=self._run, name='progress-renderer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        with self._draw_lock:
+            self._erase()
+            if sys.stdout is not self._stream and isinstance(sys.stdout, _StatusStream):
+                sys.stdout = self._stream
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.render()
+
+    def _erase(self):
+        # Caller holds _draw_lock
+        if self._lines:
+            self._stream.write(Cursor.UP(self._lines) + '\r\x1b[J')
+            self._lines = 0
+            self._at_line_start = True
+
+    def transferred(self):
+        """Total bytes received by all downloads so far."""
+        with self._slots_lock:
+            slots = list(self._slots.values())
+        return sum(slot.completed_bytes + slot.downloaded for slot in slots)
+
+    def _snapshot(self):
+        with self._slots_lock:
+            slots = list(self._slots.values())
+        now = time.time()
+        transferred = sum(slot.completed_bytes + slot.downloaded for slot in slots)
+        elapsed = now - self._last_time
+        if elapsed > 0:
+            rate = max(0, transferred - self._last_bytes) / elapsed
+            # Smooth the aggregate rate so the ETA doesn't jump every frame
+            self.throughput = rate if not self.throughput else 0.7 * self.throughput + 0.3 * rate
+        self._last_bytes, self._last_time = transferred, now
+        return [slot for slot in slots if slot.title], transferred
+
+    def _eta(self, active, transferred):
+        finished = self.state['finished_files']
+        pending = max(0, self.state['total_files'] - finished - len(active))
+        remaining = sum(max(0, slot.total - slot.downloaded) for slot in active)
+        if pending:
+            done_bytes = transferred - sum(slot.downloaded for slot in active)
+            if finished and done_bytes:
+                avg = done_bytes / finished
+            else:
+                sizes = [slot.total for slot in active if slot.total]
+                avg = sum(sizes) / len(sizes) if sizes else 0
+            remaining += avg * pending
+        if not self.throughput or not remaining:
+            return None
+        return remaining / self.throughput
+
+    def render(self):
+        active, transferred = self._snapshot()
+        eta = self._eta(active, transferred)
+        eta_text = f"{int(eta) // 60}m{int(eta) % 60:02d}s" if eta is not None else 'N/A'
+        elapsed = time.time() - self.state['start_time']
+        # '+' while a streamed playlist listing is still adding entries
+        more = '+' if self.state.get('listing') else ''
+        summary = (f"Total: {self.throughput / (1024 * 1024):6.2f}MB/s | Files: {self.state['finished_files']}/{self.state['total_files']}{more}"
+                   f" | Active: {len(active)} | Elapsed: {elapsed:.1f}s | ETA: {eta_text}")
+        extra = self.extra_status() if self.extra_status else None
+        if not self._tty:
+            # Logs and pipes get one plain summary line every few seconds
+            if extra:
+                summary = f"{summary} | {extra}"
+            if time.time() - self._last_plain >= 5:
+                self._last_plain = time.time()
+                self._stream.write(summary + '\n')
+                self._stream.flush()
+            return
+        lines = [Fore.GREEN + summary + Style.RESET_ALL]
+        if extra:
+            lines.append(Fore.MAGENTA + extra + Style.RESET_ALL)
+        width = shutil.get_terminal_size((100, 20)).columns
+        for slot in active:
+            percent = slot.downloaded / slot.total * 100 if slot.total else 0
+            filled = int(20 * percent // 100)
+            bar = '█' * filled + '-' * (20 - filled)
+            line = (f"[{bar}] {percent:6.2f}% | {slot.downloaded / (1024 * 1024):7.2f}MB / {slot.total / (1024 * 1024):7.2f}MB"
+                    f" | {slot.speed / 1024:8.2f}KB/s | {slot.title}")
+            lines.append(Fore.CYAN + line[:width - 1] + Style.RESET_ALL)
+        with self._draw_lock:
+            self._erase()
+            prefix = '' if self._at_line_start else '\n'
+            self._stream.write(prefix + '\n'.join(lines) + '\n')
+            self._stream.flush()
+            self._lines = len(lines)
+            self._at_line_start = True
+
+
+class SlotLimiter:
+    """Counting gate whose limit can change while downloads are running."""
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def set_limit(self, limit):
+        with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+
+class MemoryCeiling:
+    """--memory-limit: tells the scheduler when the process RSS is over the
+    limit, so it stops resolving entries ahead of the downloads (whose full
+    info dicts are what grows) until usage is back under it."""
+
+    def __init__(self, limit_mb, interval=MEMORY_CHECK_INTERVAL):
+        self.limit = limit_mb * 1024 * 1024
+        self.interval = interval
+        self._process = psutil.Process()
+        self._checked = 0.0
+        self._over = False
+
+    def exceeded(self):
+        now = time.monotonic()
+        if now - self._checked >= self.interval:
+            self._checked = now
+            rss = self._process.memory_info().rss
+            over = rss > self.limit
+            if over != self._over:
+                state = 'over' if over else 'back under'
+                action = 'prefetching paused' if over else 'prefetching resumed'
+                print(Fore.BLUE + f"[memory] RSS {rss / (1024 * 1024):.0f} MB is {state} the {self.limit / (1024 * 1024):.0f} MB limit; {action}."
+                      + Style.RESET_ALL)
+            self._over = over
+        return self._over
+
+
+class FragmentBudget:
+    """One cap on the HTTP streams of all running downloads (--fragment-budget).
+
+    Every download gets an equal share of the budget among the entries that
+    can run at once: the active download slots, or fewer once only a few
+    entries are left. The share becomes its YoutubeDL's
+    concurrent_fragment_downloads, so many small entries run side by side
+    with a stream or two each while the last few large ones fan out over more
+    fragments. Shares are recomputed whenever one of a download's formats
+    finishes (video+audio is two), so streams freed by finished entries go to
+    the ones still running. Granted streams never add up to more than
+    `total`; a download waits for a free stream when none is left."""
+
+    def __init__(self, total, slots, remaining):
+        self.total = max(1, total)
+        # Callables: download slots currently allowed, entries not finished yet
+        self.slots = slots
+        self.remaining = remaining
+        self.in_use = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def share(self):
+        return max(1, self.total // max(1, min(self.slots(), self.remaining())))
+
+    @contextlib.contextmanager
+    def lease(self, ydl):
+        """Streams for the download that `ydl` runs on this thread."""
+        with self._cond:
+            while self.in_use >= self.total:
+                self._cond.wait(0.5)
+                raise_if_cancelled()
+            granted = min(self.share(), self.total - self.in_use)
+            self.in_use += granted
+        lease = self._local.lease = [ydl, granted]
+        # Pooled instances outlive the lease; put their own setting back afterwards
+        previous = ydl.params.get('concurrent_fragment_downloads')
+        ydl.params['concurrent_fragment_downloads'] = granted
+        try:
+            yield granted
+        finally:
+            self._local.lease = None
+            if previous is None:
+                ydl.params.pop('concurrent_fragment_downloads', None)
+            else:
+                ydl.params['concurrent_fragment_downloads'] = previous
+            with self._cond:
+                self.in_use -= lease[1]
+                self._cond.notify_all()
+
+    def rebalance(self):
+        """Resize this thread's share before its download's next format."""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            return
+        ydl, granted = lease
+        with self._cond:
+            target = max(1, min(self.share(), self.total - self.in_use + granted))
+            self.in_use += target - granted
+            lease[1] = target
+            if target < granted:
+                self._cond.notify_all()
+        ydl.params['concurrent_fragment_downloads'] = target
+
+
+class ConcurrencyController:
+    """Grows or shrinks the active download slots (--concurrency auto).
+
+    Every `interval` seconds it measures aggregate download throughput from the
+    progress counters and samples CPU, disk and network load through psutil.
+    It hill-climbs: add a slot while throughput keeps improving, step back and
+    hold when it plateaus or drops, and shed slots when CPU or disk are
+    saturated. Every decision is printed with the measurements behind it."""
+
+    def __init__(self, limiter, sample_bytes, min_slots=1, max_slots=8, interval=AUTO_CONCURRENCY_INTERVAL):
+        self.limiter = limiter
+        self.sample_bytes = sample_bytes
+        self.min_slots = max(1, min_slots)
+        self.max_slots = max(self.min_slots, max_slots)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._hold = 0
+        self._last_rate = None
+        self._last_action = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='concurrency-controller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        psutil.cpu_percent(None)
+        last_bytes, last_time = self.sample_bytes(), time.time()
+        last_disk = psutil.disk_io_counters()
+        last_net = psutil.net_io_counters()
+        while not self._stop.wait(self.interval):
+            now = time.time()
+            elapsed = max(1e-6, now - last_time)
+            transferred = self.sample_bytes()
+            rate = (transferred - last_bytes) / elapsed
+            cpu = psutil.cpu_percent(None)
+            disk = psutil.disk_io_counters()
+            net = psutil.net_io_counters()
+            # busy_time is only reported on some platforms
+            disk_busy = None
+            if disk is not None and last_disk is not None and hasattr(disk, 'busy_time'):
+                disk_busy = min(100.0, (disk.busy_time - last_disk.busy_time) / (elapsed * 10))
+            net_rate = (net.bytes_recv - last_net.bytes_recv) / elapsed if net and last_net else 0
+            last_bytes, last_time, last_disk, last_net = transferred, now, disk, net
+            self._decide(rate, cpu, disk_busy, net_rate)
+
+    def _decide(self, rate, cpu, disk_busy, net_rate):
+        current = self.limiter.limit
+        target, reason = current, 'hold'
+        if self.limiter.active < current:
+            reason = 'hold: not all slots busy'
+        elif cpu >= AUTO_CPU_HIGH:
+            target, reason = current - 1, f'cpu saturated ({cpu:.0f}%)'
+        elif disk_busy is not None and disk_busy >= AUTO_DISK_HIGH:
+            target, reason = current - 1, f'disk saturated ({disk_busy:.0f}% busy)'
+        elif self._hold > 0:
+            self._hold -= 1
+            reason = 'hold: cooling down after plateau'
+        elif self._last_rate is None or self._last_action != 'grow':
+            target, reason = current + 1, 'probe: try one more slot'
+        elif rate >= self._last_rate * (1 + AUTO_MIN_GAIN):
+            target, reason = current + 1, f'throughput improved {self._gain(rate):+.0f}%'
+        else:
+            target, reason = current - 1, f'throughput plateaued {self._gain(rate):+.0f}%'
+            self._hold = AUTO_HOLD_INTERVALS
+        target = max(self.min_slots, min(self.max_slots, target))
+        self._last_action = 'grow' if target > current else ('shrink' if target < current else 'hold')
+        self._last_rate = rate
+        disk_text = f"{disk_busy:.0f}%" if disk_busy is not None else 'n/a'
+        print(Fore.BLUE + f"[auto-concurrency] slots {current} -> {target} ({reason}) | "
+              f"throughput {rate / (1024 * 1024):.2f}MB/s | cpu {cpu:.0f}% | disk {disk_text} | "
+              f"net {net_rate / (1024 * 1024):.2f}MB/s" + Style.RESET_ALL)
+        if target != current:
+            self.limiter.set_limit(target)
+
+    def _gain(self, rate):
+        return (rate / self._last_rate - 1) * 100 if self._last_rate else 0
+
+
+def resolve_info(ydl, url, cache=None, cache_key=None):
+    """Return full, format-selected info for `url` using `ydl`.
+
+    The raw extractor result (before format selection) is what gets cached, so a
+    cached entry serves any later --quality or download type without another
+    network round-trip."""
+    cache_key = cache_key or url
+    raw = cache.get(cache_key) if cache is not None else None
+    if raw is None:
+        raw = ydl.extract_info(url, download=False, process=False)
+        if raw is None or raw.get('_type', 'video') != 'video':
+            # Redirects and nested playlists: let yt-dlp resolve them fully
+            return ydl.extract_info(url, download=False)
+        if cache is not None:
+            cache.put(cache_key, raw)
+    return ydl.process_ie_result(raw, download=False)
+
+
+class DownloadCancelled(Exception):
+    """Raised from a progress hook to abort a transfer that was cancelled or ran past its deadline."""
+
+
+# Cancellation events watched by the progress hooks of the current worker thread
+_cancel_local = threading.local()
+
+
+def cancel_requested():
+    """True when the work running on this thread should stop (Ctrl-C, a deadline,
+    or a cancelled serve-mode job)."""
+    return job_cancelled() or any(event.is_set() for event in getattr(_cancel_local, 'events', ()))
+
+
+def raise_if_cancelled():
+    if cancel_requested():
+        raise DownloadCancelled('cancelled')
+
+
+# Errors worth another attempt: throttling and server-side or network trouble
+TRANSIENT_HTTP_STATUS = {403, 408, 425, 429, 500, 502, 503, 504}
+TRANSIENT_PATTERN = re.compile(r"HTTP Error (?:403|408|425|429|5\d\d)|timed? ?out|temporary failure|connection (?:reset|refused|aborted)"
+                               r"|remote end closed|incomplete ?read|network is unreachable|name resolution|confirm you.re not a bot"
+                               r"|too many requests|unable to download (?:webpage|API page|JSON)", re.IGNORECASE)
+THROTTLE_PATTERN = re.compile(r"HTTP Error 429|too many requests|confirm you.re not a bot|rate.?limit", re.IGNORECASE)
+
+
+def classify_failure(error):
+    """Sort a download or metadata error into 'throttled', 'transient' or
+    'permanent'; returns (kind, reason). The exception chain is searched for
+    an HTTP status or a network error before falling back to the message.
+    Anything unrecognized (unavailable, private, removed videos...) is
+    permanent, so it is never retried."""
+    from yt_dlp.networking.exceptions import TransportError, IncompleteRead
+    # yt-dlp messages look like 'ERROR: \r[download] Got error: HTTP Error 503: ...'
+    lines = [re.sub(r'^(?:ERROR:\s*)?(?:\[\w+\]\s*)?(?:Got error:\s*)?', '', line.strip())
+             for line in str(error).replace('\r', '\n').splitlines()]
+    reason = next((line for line in lines if line), type(error).__name__)
+    seen = set()
+    pending = [error]
+    while pending:
+        exc = pending.pop()
+        if exc is None or id(exc) in seen:
+            continue
+        seen.add(id(exc))
+        status = getattr(exc, 'status', None) or getattr(exc, 'code', None)
+        if isinstance(status, int) and 400 <= status < 600:
+            if status == 429:
+                return 'throttled', reason
+            return ('transient' if status in TRANSIENT_HTTP_STATUS else 'permanent'), reason
+        if isinstance(exc, (TransportError, IncompleteRead, TimeoutError, ConnectionError)):
+            return 'transient', reason
+        exc_info = getattr(exc, 'exc_info', None)
+        pending.extend([exc_info[1] if exc_info else None, getattr(exc, 'cause', None), exc.__cause__, exc.__context__])
+    if THROTTLE_PATTERN.search(reason):
+        return 'throttled', reason
+    if TRANSIENT_PATTERN.search(reason):
+        return 'transient', reason
+    return 'permanent', reason
+
+
+class RetryLater(Exception):
+    """Raised by a run_entries stage to run its entry again after `delay` seconds."""
+
+    def __init__(self, delay):
+        super().__init__(f'retry in {delay:.0f}s')
+        self.delay = delay
+
+
+class RetryQueue:
+    """Failure bookkeeping of a run: retries for transient failures, host
+    cool-downs after throttling, and the failure report.
+
+    failed() records a failure and returns the delay before the entry's next
+    attempt, or None when it is not retried (permanent, or out of attempts).
+    The delay is a jittered exponential backoff, and never ends
+    before the host's cool-down does, so a throttled host gets no requests
+    from retries until it had its rest. Retries wait outside the download
+    slots and don't hold up healthy entries."""
+
+    def __init__(self, attempts=RETRY_ATTEMPTS, backoff=RETRY_BACKOFF, max_delay=RETRY_MAX_DELAY, cooldown=HOST_COOLDOWN):
+        self.attempts = max(0, attempts)
+        self.backoff = max(0.0, backoff)
+        self.max_delay = max_delay
+        self.cooldown = cooldown
+        self.retried = 0
+        # idx -> failure record; an entry that succeeds on a retry is dropped from it
+        self.failures = {}
+        self._tries = {}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def tries(self, idx):
+        """Failed attempts of an entry so far."""
+        return self._tries.get(idx, 0)
+
+    def failed(self, idx, title, url, kind, reason, retry=True):
+        host = urllib.parse.urlparse(url or '').hostname or ''
+        now = time.time()
+        with self._lock:
+            tries = self._tries[idx] = self._tries.get(idx, 0) + 1
+            until, strikes = self._hosts.get(host, (0.0, 0))
+            if kind == 'throttled':
+                strikes += 1
+                until = max(until, now + min(self.max_delay, self.cooldown * 2 ** (strikes - 1)))
+                self._hosts[host] = (until, strikes)
+            self.failures[idx] = {'idx': idx, 'title': title, 'url': url, 'kind': kind, 'reason': reason, 'attempts': tries}
+            if not retry or kind == 'permanent' or tries > self.attempts:
+                return None
+            self.retried += 1
+        step = min(self.max_delay, self.backoff * 2 ** (tries - 1))
+        # Half of the step is jitter, so entries that failed together don't retry together
+        return max(step / 2 + random.uniform(0, step / 2), until - now)
+
+    def succeeded(self, idx, url):
+        host = urllib.parse.urlparse(url or '').hostname or ''
+        with self._lock:
+            self.failures.pop(idx, None)
+            if host in self._hosts:
+                # The host answers again; later strikes start from a short cool-down
+                self._hosts[host] = (self._hosts[host][0], 0)
+
+    def exit_code(self):
+        if not self.failures:
+            return EXIT_OK
+        if any(f['kind'] == 'permanent' for f in self.failures.values()):
+            return EXIT_FAILED_ENTRIES
+        return EXIT_RETRY_LATER
+
+    def report(self, path=None, resumable=True):
+        """Print the entries that did not download (and write them to `path` as
+        JSON); returns the run's exit code. `resumable` runs (journaled
+        playlists) point at --resume for the transient ones."""
+        code = self.exit_code()
+        failures = [self.failures[idx] for idx in sorted(self.failures)]
+        if path:
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({'exit_code': code, 'retried': self.retried, 'failures': failures}, f, indent=2)
+            except OSError as e:
+                print(Fore.RED + f"Could not write the failure report to {path}: {e}" + Style.RESET_ALL)
+        if not failures:
+            if self.retried:
+                print(Fore.GREEN + f"All entries done ({self.retried} retried after a transient failure)." + Style.RESET_ALL)
+            return code
+        print(Fore.RED + f"\nFailure report: {len(failures)} entr{'y' if len(failures) == 1 else 'ies'} not downloaded" + Style.RESET_ALL)
+        for f in failures:
+            print(Fore.RED + f"  #{f['idx']} {f['title'] or f['url'] or 'entry'} [{f['kind']}, {f['attempts']} attempt(s)]: {f['reason']}" + Style.RESET_ALL)
+        if code == EXIT_RETRY_LATER:
+            print(Fore.YELLOW + "Only transient failures are left; run again later"
+                  + (" (--resume retries them)." if resumable else ".") + Style.RESET_ALL)
+        return code
+
+
+def claim_outcome():
+    """True when the worker call running on this thread may record its entry's
+    outcome. run_entries claims it instead once a resolve ran past its deadline,
+    so a call that fails late doesn't count the entry a second time."""
+    settle = getattr(_cancel_local, 'settle', None)
+    return settle is None or settle.acquire(blocking=False)
+
+
+async def run_entries(items, resolve, process, concurrency=1, prefetch=2, limiter=None, executors=None,
+                      resolve_timeout=None, download_timeout=None, cancel=None, on_timeout=None, hold_prefetch=None):
+    """Run `process(resolve(item))` for every item: blocking yt-dlp calls on two
+    thread pools, up to `prefetch` resolves ahead of `concurrency` downloads,
+    each call with its own deadline. A None from `resolve` drops the entry;
+    cancelling returns only once every started call has finished."""
+    loop = asyncio.get_running_loop()
+    cancel = cancel or threading.Event()
+    concurrency = max(1, concurrency)
+    prefetch = max(0, prefetch)
+    ahead = asyncio.Semaphore(concurrency + prefetch)
+    in_flight = set()
+    # Resolved entries waiting for a download slot, as (spawn order, future)
+    waiting = []
+    free_slots = concurrency
+
+    def mark_started(started):
+        if not started.done():
+            started.set_result(None)
+
+    def in_thread(fn, arg, abort, started, settle=None, limited=False):
+        # Progress hooks on the worker thread watch the run's and the entry's cancel events
+        def run():
+            _cancel_local.events = (cancel, abort)
+            _cancel_local.settle = settle
+            if limited and limiter is not None:
+                limiter.acquire()
+            try:
+                loop.call_soon_threadsafe(mark_started, started)
+                return fn(arg)
+            finally:
+                if limited and limiter is not None:
+                    limiter.release()
+                _cancel_local.events = ()
+                _cancel_local.settle = None
+        return run
+
+    async def finish(fut, timeout, abort, started=None):
+        """Wait for an executor call up to `timeout` after a worker picked it up;
+        on cancellation, abort it and wait for it to end."""
+        in_flight.add(fut)
+        fut.add_done_callback(in_flight.discard)
+        try:
+            if timeout and started is not None:
+                # Time spent queued for a worker doesn't count against the deadline
+                await asyncio.wait([fut, started], return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.CancelledError:
+            cancel.set()
+            abort.set()
+            await asyncio.wait([fut])
+            raise
+
+    async def download_slot(order):
+        nonlocal free_slots
+        if free_slots and not waiting:
+            free_slots -= 1
+            return
+        granted = loop.create_future()
+        heapq.heappush(waiting, (order, granted))
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.done() and not granted.cancelled():
+                release_slot()
+            raise
+
+    def release_slot():
+        nonlocal free_slots
+        while waiting:
+            _, granted = heapq.heappop(waiting)
+            if not granted.done():
+                granted.set_result(None)
+                return
+        free_slots += 1
+
+    async def resolve_item(item):
+        abort = threading.Event()
+        settle = threading.Lock()
+        started = loop.create_future()
+        fut = loop.run_in_executor(resolve_pool, in_thread(resolve, item, abort, started, settle))
+        try:
+            return await finish(fut, resolve_timeout, abort, started)
+        except asyncio.TimeoutError:
+            if not settle.acquire(blocking=False):
+                # The call is already recording its own failure; that outcome stands
+                return await finish(fut, None, abort)
+            abort.set()
+            print(Fore.RED + f"Entry {item[0]}: no metadata within {resolve_timeout}s." + Style.RESET_ALL)
+            if on_timeout is not None:
+                on_timeout(item)
+            return None
+
+    async def run_entry(item, order):
+        nonlocal active
+        active += 1
+        try:
+            if cancel.is_set():
+                return
+            try:
+                resolved = await resolve_item(item)
+            except RetryLater as retry:
+                retry_later(item, retry.delay)
+                return
+            except Exception as e:
+                print(Fore.RED + f"Error resolving entry: {e}" + Style.RESET_ALL)
+                return
+            if resolved is None:
+                return
+            await download_slot(order)
+            try:
+                if cancel.is_set():
+                    return
+                abort = threading.Event()
+                started = loop.create_future()
+                idx = resolved[0]
+                fut = loop.run_in_executor(download_pool, in_thread(process, resolved, abort, started, limited=True))
+                resolved = None
+                try:
+                    await finish(fut, download_timeout, abort, started)
+                except asyncio.TimeoutError:
+                    print(Fore.RED + f"Entry {idx}: download ran past {download_timeout}s; aborting it." + Style.RESET_ALL)
+                    abort.set()
+                    await asyncio.wait([fut])
+                    retry = fut.exception()
+                    if isinstance(retry, RetryLater):
+                        retry_later(item, retry.delay)
+                except RetryLater as retry:
+                    retry_later(item, retry.delay)
+                except Exception as e:
+                    print(Fore.RED + f"Error downloading {idx}: {e}" + Style.RESET_ALL)
+            finally:
+                release_slot()
+        finally:
+            active -= 1
+            ahead.release()
+
+    def spawn(item):
+        task = asyncio.create_task(run_entry(item, next(order)))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def retry_later(item, delay):
+        async def wait_and_retry():
+            try:
+                await asyncio.wait_for(stopped.wait(), delay)
+            except asyncio.TimeoutError:
+                await ahead.acquire()
+                spawn(item)
+        task = asyncio.create_task(wait_and_retry())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def watch_cancel():
+        while not cancel.is_set():
+            await asyncio.sleep(0.2)
+        stopped.set()
+        if hasattr(items, 'close'):
+            items.close()
 
-def download_video(ydl_opts, url, info, force=False, preserve_index=False):
+    with contextlib.ExitStack() as stack:
+        if executors is not None:
+            resolve_pool, download_pool = executors
+        else:
+            # Every entry let ahead of the downloads gets its own resolve thread
+            resolve_pool = stack.enter_context(concurrent_futures.ThreadPoolExecutor(
+                max_workers=concurrency + prefetch, thread_name_prefix='resolve'))
+            download_pool = stack.enter_context(concurrent_futures.ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix='download'))
+        tasks = set()
+        stopped = asyncio.Event()
+        watcher = asyncio.create_task(watch_cancel())
+        iterator = iter(items)
+        end = object()
+        order = itertools.count()
+        active = 0
+        try:
+            while not cancel.is_set():
+                while hold_prefetch is not None and active >= concurrency and not cancel.is_set() and hold_prefetch():
+                    await asyncio.sleep(MEMORY_CHECK_INTERVAL)
+                await ahead.acquire()
+                # Pulling the next item can block (a streamed listing), so it runs off the loop
+                item = await loop.run_in_executor(None, next, iterator, end)
+                if item is end:
+                    ahead.release()
+                    break
+                spawn(item)
+            while tasks:
+                await asyncio.wait(set(tasks))
+            if in_flight:
+                # Resolves that ran past their deadline; they end at the socket timeout
+                await asyncio.wait(set(in_flight))
+        except asyncio.CancelledError:
+            cancel.set()
+            if in_flight:
+                print(Fore.YELLOW + f"\nCancelling: waiting for {len(in_flight)} running call(s) to stop..." + Style.RESET_ALL)
+            # Entry tasks abort their own calls; wait for them so no worker thread outlives the run
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if in_flight:
+                await asyncio.wait(set(in_flight))
+            raise
+        finally:
+            watcher.cancel()
+
+
+def open_listing(ydl, url):
+    """extract_info without processing, so a playlist's `entries` stay lazy (a
+    generator or paged list) and only the first page is fetched here. URL
+    redirects are followed."""
+    info = ydl.extract_info(url, download=False, process=False)
+    for _ in range(5):
+        if not info or info.get('_type') not in ('url', 'url_transparent'):
+            break
+        info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+    return info
+
+
+def iter_entries(entries):
+    """Iterate playlist entries without materializing them. yt-dlp's paged lists
+    are read STREAM_SLICE_SIZE entries at a time through their public
+    getslice(), so a page is only fetched when the iteration reaches it."""
+    if not hasattr(entries, 'getslice'):
+        return iter(entries or [])
+    return _iter_pages(entries)
+
+
+def _iter_pages(entries):
+    # The list caches its pages, so one spanning two slices is still fetched once
+    start = 0
+    while True:
+        chunk = entries.getslice(start, start + STREAM_SLICE_SIZE)
+        yield from chunk
+        if len(chunk) < STREAM_SLICE_SIZE:
+            return
+        start += STREAM_SLICE_SIZE
+
+
+class PlaylistStream:
+    """Playlist entries handed to the download stage while the listing is still
+    being paged in.
+
+    A producer thread walks the lazy `entries`, turns each one into an
+    (idx, entry, url) item with `prepare` (None drops it) and puts it on a
+    bounded queue, so the listing never runs more than `maxsize` items ahead of
+    the downloads. Iterating the stream yields the items. `total` counts the
+    entries listed so far; `on_done(stream)` runs when the listing ends, with
+    `error` set if it stopped early."""
+
+    _END = object()
+
+    def __init__(self, entries, prepare, maxsize=STREAM_QUEUE_SIZE, on_done=None):
+        self.total = 0
+        self.error = None
+        self._prepare = prepare
+        self._on_done = on_done
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._produce, args=(entries,), name='playlist-listing', daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, entries):
+        try:
+            for entry in iter_entries(entries):
+                if self._closed.is_set():
+                    return
+                if not entry:
+                    continue
+                self.total += 1
+                item = self._prepare(self.total, entry)
+                if item is not None and not self._put(item):
+                    return
+        except Exception as e:
+            self.error = e
+            if not self._closed.is_set():
+                print(Fore.RED + f"Playlist listing stopped after {self.total} entries: {e}" + Style.RESET_ALL)
+        if self._on_done is not None and not self._closed.is_set():
+            self._on_done(self)
+        self._put(self._END)
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+                continue
+            if item is self._END:
+                return
+            yield item
+
+    def close(self):
+        """Stop listing (the producer exits at its next entry or queue wait) and end iteration."""
+        self._closed.set()
+
+
+def read_batch_urls(path):
+    """URLs of a --batch file ('-' reads stdin), one per line. Blank lines,
+    '#' comments and repeated URLs are skipped."""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#') and line not in urls:
+            urls.append(line)
+    return urls
+
+
+def interleave(sources):
+    """Round-robin over several iterables: the first item of each, then the
+    second of each, and so on."""
+    iterators = [iter(source) for source in sources]
+    while iterators:
+        alive = []
+        for it in iterators:
+            for item in it:
+                yield item
+                alive.append(it)
+                break
+        iterators = alive
+
+
+def entry_size(entry, bytes_per_second):
+    """Expected download size of a listed entry: its filesize when the listing
+    has one, else estimated from its duration; None when neither is known."""
+    size = entry.get('filesize') or entry.get('filesize_approx')
+    if size:
+        return float(size)
+    if entry.get('duration'):
+        return float(entry['duration']) * bytes_per_second
+    return None
+
+
+def schedule_entries(items, policy, bytes_per_second):
+    """Order (idx, entry, url) items for download by `policy`.
+
+    'longest' starts the biggest entries first, so a long video at the end of
+    a playlist doesn't keep one slot busy after the others went idle (shortest
+    overall run); 'shortest' gets the first files done soonest; 'playlist'
+    keeps listing order. Entries of unknown size count as the median of the
+    known ones. Ties keep listing order, and every item keeps its idx, so
+    file names keep their playlist index. Returns (items, known, total_bytes)."""
+    sizes = [entry_size(entry, bytes_per_second) for _, entry, _ in items]
+    known = sorted(size for size in sizes if size is not None)
+    median = known[len(known) // 2] if known else 0.0
+    sizes = [median if size is None else size for size in sizes]
+    total = sum(sizes)
+    if policy == 'playlist' or not known:
+        return list(items), len(known), total
+    order = sorted(range(len(items)), key=lambda n: -sizes[n] if policy == 'longest' else sizes[n])
+    return [items[n] for n in order], len(known), total
+
+
+def print_batch_summary(sources):
+    print(Fore.GREEN + "\nBatch summary:" + Style.RESET_ALL)
+    for n, src in enumerate(sources, start=1):
+        if src.get('error'):
+            print(Fore.RED + f"  [{n}] {src['url']}: listing failed ({src['error']})" + Style.RESET_ALL)
+            continue
+        counts = (f"{src['listed']} listed, {src['duplicates']} duplicate(s) of other sources, {src['downloaded']} downloaded,"
+                  f" {src['existing']} already present, {src['archived']} in archive, {src['failed']} failed")
+        color = Fore.RED if src['failed'] else Fore.CYAN
+        print(color + f"  [{n}] {src['url']}: {counts}" + Style.RESET_ALL)
+
+
+class PostProcessPool:
+    """Runs yt-dlp post-processors (ffmpeg conversion, subtitle embedding) on
+    their own pool.
+
+    Downloads are made without post-processors and each finished file's info is
+    submitted here, so a download slot is freed as soon as the transfer ends and
+    CPU-heavy work runs under a separate concurrency limit (CPU count by
+    default). Progress and failures are tracked separately from downloads;
+    submit_entry() reports back once all files of an entry are processed, so
+    the entry is only recorded as done when its final files exist."""
+
+    def __init__(self, postprocessors, ydl_opts, workers=None, on_file=None):
+        self.postprocessors = [dict(pp) for pp in postprocessors]
+        self.on_file = on_file
+        # Hooks belong to the download stage; the pool's YoutubeDL only hosts the post-processors
+        self._opts = {k: v for k, v in ydl_opts.items() if k not in ('progress_hooks', 'post_hooks', 'postprocessors')}
+        self._ydl_pool = YDLPool()
+        self._exe = concurrent_futures.ThreadPoolExecutor(max_workers=max(1, workers or os.cpu_count() or 1),
+                                                          thread_name_prefix='postprocess')
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.done = 0
+        self.failures = []
+        self._closed = False
+
+    def submit(self, info, on_done=None):
+        """Queue one downloaded file; `on_done(error)` is called once it is
+        processed (error is the exception, or None on success)."""
+        with self._lock:
+            self.queued += 1
+        self._exe.submit(self._run, info, on_done)
+
+    def submit_entry(self, infos, on_done):
+        """Queue the files of one entry; `on_done(error)` is called once all of
+        them are processed, with the first failure or None."""
+        state = {'left': len(infos), 'error': None}
+
+        def file_done(error):
+            with self._lock:
+                state['left'] -= 1
+                state['error'] = state['error'] or error
+                last = state['left'] == 0
+            if last:
+                on_done(state['error'])
+
+        for info in infos:
+            self.submit(info, file_done)
+
+    def _run(self, info, on_done=None):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        name = os.path.basename(info.get('filepath') or info.get('_filename') or '')
+        error = None
+        try:
+            ydl = self._ydl_pool.get(self._opts)
+            with metrics.phase('postprocess', file=name):
+                for pp_def in self.postprocessors:
+                    pp_def = dict(pp_def)
+                    pp_def.pop('when', None)
+                    pp = yt_dlp_postprocessor.get_postprocessor(pp_def.pop('key'))(ydl, **pp_def)
+                    info = ydl.run_pp(pp, info)
+            if self.on_file is not None and info.get('filepath'):
+                self.on_file(info['filepath'])
+            with self._lock:
+                self.done += 1
+            metrics.count('postprocess', result='done')
+            print(Fore.CYAN + f"Post-processed: {os.path.basename(info.get('filepath') or name)}" + Style.RESET_ALL)
+        except Exception as e:
+            error = e
+            with self._lock:
+                self.failures.append((name, str(e)))
+            metrics.count('postprocess', result='failed')
+            print(Fore.RED + f"Post-processing failed for {name}: {e}" + Style.RESET_ALL)
+        finally:
+            with self._lock:
+                self.running -= 1
+        if on_done is not None:
+            try:
+                on_done(error)
+            except Exception as e:
+                print(Fore.RED + f"Error recording post-processed file {name}: {e}" + Style.RESET_ALL)
+
+    def status(self):
+        with self._lock:
+            return f"Post-processing: {self.running} running, {self.queued} queued, {self.done} done, {len(self.failures)} failed"
+
+    def shutdown(self):
+        """Wait for queued work, then print a summary of the post-processing stage."""
+        if self._closed:
+            return
+        self._closed = True
+        self._exe.shutdown(wait=True)
+        self._ydl_pool.close()
+        if self.done or self.failures:
+            print(Fore.GREEN + f"Post-processing finished: {self.done} done, {len(self.failures)} failed." + Style.RESET_ALL)
+        for name, error in self.failures:
+            print(Fore.RED + f"  {name}: {error}" + Style.RESET_ALL)
+
+
+# Process-pool mode: state of the current worker process, set up by _init_process_worker
+_worker_state = {}
+
+# Progress hook fields forwarded from worker processes to the parent
+PROGRESS_FIELDS = ('status', 'downloaded_bytes', 'total_bytes', 'total_bytes_estimate', 'speed', 'eta', 'filename')
+
+
+class _QueueWriter:
+    """stdout replacement in worker processes: complete lines are sent to the
+    parent, which prints them through its own (progress-aware) stdout."""
+
+    def __init__(self, msg_queue):
+        self._queue = msg_queue
+        self._buffer = ''
+
+    def write(self, s):
+        self._buffer += s
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            self._queue.put(('log', line))
+        return len(s)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def _init_process_worker(opts, dup_snapshot, download_dir, cache_config, msg_queue, defer_postprocessing=False,
+                         metrics_enabled=False, cancel=None):
+    import signal
+    # Ctrl-C reaches the whole process group; the parent cancels the run through `cancel`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cancel is not None:
+        # Jobs run on this thread, so cancel_requested() and the progress hook see the run's event
+        _cancel_local.events = (cancel,)
+    sys.stdout = _QueueWriter(msg_queue)
+    if metrics_enabled:
+        metrics.configure(forward=lambda observation: msg_queue.put(('metric', observation)))
+    dup_index = DuplicateIndex(download_dir, snapshot=dup_snapshot)
+    last_sent = [0.0]
+
+    def forward_progress(d):
+        raise_if_cancelled()
+        # Throttle 'downloading' updates; state changes are always forwarded
+        now = time.time()
+        if d.get('status') == 'downloading' and now - last_sent[0] < 0.2:
+            return
+        last_sent[0] = now
+        fields = {k: d.get(k) for k in PROGRESS_FIELDS}
+        fields['info_dict'] = {'title': (d.get('info_dict') or {}).get('title')}
+        msg_queue.put(('progress', os.getpid(), fields))
+
+    def forward_file(path):
+        msg_queue.put(('file', path))
+
+    worker_opts = dict(opts, progress_hooks=[forward_progress], post_hooks=[dup_index.add, forward_file])
+    cache = None
+    if cache_config:
+        try:
+            cache = MetadataCache(**cache_config)
+        except (OSError, sqlite3.Error):
+            pass
+    _worker_state.update(
+        opts=worker_opts,
+        dup_index=dup_index,
+        pool=YDLPool(),
+        cache=cache,
+        queue=msg_queue,
+        # Finished files go back with the result, to the parent's post-processing pool
+        defer_postprocessing=defer_postprocessing,
+    )
+
+
+def _process_job(item, force, total):
+    """Resolve-then-download of one entry, for worker processes. Results go back to the
+    parent over the message queue as ('result', idx, ok, info, failure); info is
+    None when the entry's info could not be fetched (else it holds the entry's
+    id, title, url and, with deferred post-processing, the 'downloaded' files),
+    and failure is (kind, reason, url) for a failed entry (see classify_failure)."""
+    idx, entry, entry_url = item
+    state = _worker_state
+    if cancel_requested():
+        # Left queued in the journal, so --resume picks it up
+        return None
+    try:
+        full_info = entry
+        if not is_resolved(full_info):
+            with metrics.phase('resolve', idx=idx):
+                full_info = resolve_info(state['pool'].get(state['opts']), entry_url,
+                                         cache=state['cache'], cache_key=archive_key(entry) or entry_url)
+    except Exception as e:
+        print(Fore.RED + f"Failed to fetch info for entry {idx}: {e}" + Style.RESET_ALL)
+        metrics.count('resolve_failures')
+        state['queue'].put(('result', idx, False, None, classify_failure(e) + (entry_url,)))
+        return None
+    full_info = dict(full_info, dl_index=entry.get('dl_index') or idx)
+    state['queue'].put(('started', idx))
+    print(Fore.CYAN + f"\nProcessing video {idx}/{total}: {full_info.get('title', f'Video {idx}')}" + Style.RESET_ALL)
+    errors = []
+    downloaded = []
+    ok = download_video(state['opts'], entry_url, full_info, force=force, preserve_index=True,
+                        dup_index=state['dup_index'], ydl_pool=state['pool'],
+                        on_downloaded=downloaded.append if state['defer_postprocessing'] else None,
+                        on_error=errors.append)
+    summary = {k: full_info.get(k) for k in ('id', 'title', 'extractor_key')}
+    summary['url'] = entry_url
+    if downloaded:
+        summary['downloaded'] = [yt_dlp.YoutubeDL.sanitize_info(d) for d in downloaded]
+    state['queue'].put(('result', idx, ok, summary, classify_failure(errors[0]) + (entry_url,) if errors else None))
+    return ok
+
+
+def run_process_pool(items, opts, dup_index, on_message, concurrency=1, force=False, cache_config=None, limiter=None,
+                     defer_postprocessing=False, total=None, cancel=None):
+    """Run playlist entries in a pool of worker processes.
+
+    Hooks can't be pickled, so `opts` must be free of callables; workers add
+    their own hooks and report progress, log lines, finished files and results
+    over a queue that a parent thread hands to `on_message`. Each worker gets a
+    snapshot of the duplicate index instead of rescanning the folder. With a
+    SlotLimiter, entries are only submitted while a slot is free. `items` may be
+    any iterable (e.g. a PlaylistStream); at most two entries per worker are
+    submitted ahead, and `total` returns the entry count shown in messages.
+    Setting `cancel` (or Ctrl-C) stops submitting, drops the entries not
+    started yet and aborts the running downloads in the workers."""
+    if total is None:
+        def total():
+            return len(items)
+    # Workers start from a fresh interpreter: forking this process, whose renderer, drain and
+    # (in serve mode) HTTP threads may hold locks, can deadlock the children
+    ctx = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+    msg_queue = ctx.Queue()
+    cancel = cancel or threading.Event()
+    worker_cancel = ctx.Event()
+    run_over = threading.Event()
+
+    def watch_cancel():
+        while not run_over.is_set():
+            if cancel.wait(0.2):
+                worker_cancel.set()
+                if hasattr(items, 'close'):
+                    items.close()
+                return
+
+    def drain():
+        while True:
+            msg = msg_queue.get()
+            if msg is None:
+                return
+            try:
+                on_message(msg)
+            except Exception as e:
+                print(Fore.RED + f"Error handling worker message {msg[0]}: {e}" + Style.RESET_ALL)
+
+    drainer = threading.Thread(target=drain, name='process-results', daemon=True)
+    drainer.start()
+    watcher = threading.Thread(target=watch_cancel, name='process-cancel', daemon=True)
+    watcher.start()
+    exe = concurrent_futures.ProcessPoolExecutor(
+        max_workers=max(1, concurrency), mp_context=ctx, initializer=_init_process_worker,
+        initargs=(opts, dup_index.snapshot(), dup_index.path, cache_config, msg_queue, defer_postprocessing,
+                  metrics.enabled, worker_cancel))
+    try:
+        inflight = threading.BoundedSemaphore(2 * max(1, concurrency))
+
+        def finished(fut, idx):
+            inflight.release()
+            if limiter is not None:
+                limiter.release()
+            if fut.cancelled():
+                return
+            try:
+                fut.result()
+            except Exception as e:
+                print(Fore.RED + f"Error downloading {idx}: {e}" + Style.RESET_ALL)
+
+        for item in items:
+            while not cancel.is_set() and not inflight.acquire(timeout=0.2):
+                pass
+            if cancel.is_set():
+                break
+            if limiter is not None:
+                limiter.acquire()
+            fut = exe.submit(_process_job, item, force, total())
+            fut.add_done_callback(lambda f, idx=item[0]: finished(f, idx))
+    except KeyboardInterrupt:
+        cancel.set()
+        raise
+    finally:
+        if cancel.is_set():
+            worker_cancel.set()
+        # Entries not started yet stay queued in the journal
+        exe.shutdown(wait=True, cancel_futures=cancel.is_set())
+        run_over.set()
+        msg_queue.put(None)
+        drainer.join()
+
+
+def download_video(ydl_opts, url, info, force=False, preserve_index=False, dup_index=None, ydl_pool=None, on_downloaded=None,
+                   fragment_budget=None, on_error=None):
     """Download a single video with the provided ydl options, only if it isn't
     already downloaded. Returns True if the video was downloaded successfully,
-    or False if it was skipped or an error occurred."""
+    None if it was skipped because it already exists, or False if an error
+    occurred (both are falsy, so `if not ok` covers skip-or-fail).
+    When `ydl_pool` is given, the calling thread's pooled YoutubeDL is reused.
+    `on_downloaded` is called with the info dict of every file written (used to
+    hand files to a separate post-processing stage). With a FragmentBudget the
+    transfer runs on a share of its streams. `on_error` receives the exception
+    of a failed (not cancelled) download, for classify_failure()."""
     # We will only check whether the prepared target file already exists.
 
     opts = ydl_opts.copy() if isinstance(ydl_opts, dict) else {}
+    if dup_index is None:
+        dup_index = DuplicateIndex(download_path)
+    # Record final files (after post-processing) so later entries see them
+    post_hooks = list(opts.get('post_hooks') or [])
+    if dup_index.add not in post_hooks:
+        opts['post_hooks'] = post_hooks + [dup_index.add]
+    prepared = None
     try:
-        with YoutubeDL(opts) as ydl:
-            # prepare_filename uses the template to produce the expected filename
-            prepared = ydl.prepare_filename(info)
-            # If the exact prepared file already exists (race condition, etc.) consider it downloaded
-            if os.path.exists(prepared) and os.path.getsize(prepared) > 0 and not force:
-                print(Fore.YELLOW + f"Found existing file: {prepared}. Skipping." + Style.RESET_ALL)
-                return False
-            # Additionally, check for another file with the same normalized base name
-            # (ignores extension and trailing index suffixes like _1 or (1)).
-            prepared_base = filename_without_ext(prepared)
-            prepared_norm = normalized_basename(prepared_base, strip_index=not preserve_index)
-            for fname in os.listdir(download_path):
-                fpath = os.path.join(download_path, fname)
-                if not os.path.isfile(fpath):
-                    continue
-                if os.path.getsize(fpath) == 0:
-                    continue
-                candidate_base = filename_without_ext(fname)
+        ctx = contextlib.nullcontext(ydl_pool.get(opts)) if ydl_pool is not None else yt_dlp.YoutubeDL(opts)
+        with ctx as ydl:
+            with metrics.phase('dedupe', title=info.get('title')):
+                # prepare_filename uses the template to produce the expected filename
+                prepared = ydl.prepare_filename(info)
+                # If the exact prepared file already exists (race condition, etc.) consider it downloaded
+                exists = os.path.exists(prepared) and os.path.getsize(prepared) > 0 and not force
+                # Additionally, check for another file with the same normalized base name
+                # (ignores extension and trailing index suffixes like _1 or (1)).
                 # For playlist entries, preserve index in normalized comparison
-                candidate_norm = normalized_basename(candidate_base, strip_index=not preserve_index)
-                if candidate_norm == prepared_norm:
-                    print(Fore.YELLOW + f"Found existing matching file: {fpath}. Skipping." + Style.RESET_ALL)
-                    return False
+                existing = None if exists else dup_index.find(prepared, preserve_index=preserve_index)
+            if exists:
+                print(Fore.YELLOW + f"Found existing file: {prepared}. Skipping." + Style.RESET_ALL)
+                metrics.count('downloads', result='existing')
+                return None
+            if existing:
+                print(Fore.YELLOW + f"Found existing matching file: {existing}. Skipping." + Style.RESET_ALL)
+                metrics.count('downloads', result='existing')
+                return None
 
-            # Do actual download
-            ydl.download([url])
+            # Do actual download; resolved info is downloaded as-is, without a second extraction
+            # (post-processors run inside this phase unless the post-processing pool has them)
+            lease = fragment_budget.lease(ydl) if fragment_budget is not None else contextlib.nullcontext()
+            with metrics.phase('transfer', title=info.get('title')), lease:
+                if is_resolved(info):
+                    result = ydl.process_ie_result(dict(info), download=True)
+                else:
+                    result = ydl.extract_info(url, download=True)
+            if on_downloaded is not None:
+                video = {k: v for k, v in (result or {}).items() if k not in ('formats', 'requested_downloads')}
+                for downloaded in (result or {}).get('requested_downloads') or []:
+                    # A requested download only names its file; the post-processors need the
+                    # video's info with it (but not the format list)
+                    on_downloaded(dict(video, **{k: v for k, v in downloaded.items() if k != 'formats'}))
+            if os.path.exists(prepared):
+                dup_index.add(prepared)
+            metrics.count('downloads', result='downloaded')
             # No DB is used; we look for disk presence only.
             return True
     except Exception as e:
+        if isinstance(e, DownloadCancelled) or cancel_requested():
+            # Aborted (Ctrl-C, --download-timeout or a cancelled job): drop this entry's partial files
+            removed = remove_partial_files(os.path.dirname(prepared) or '.', os.path.splitext(os.path.basename(prepared))[0] + '.') if prepared else 0
+            print(Fore.YELLOW + f"Download cancelled: {info.get('title') or url}"
+                  + (f" ({removed} partial file(s) removed)" if removed else '') + Style.RESET_ALL)
+            metrics.count('downloads', result='cancelled')
+            return False
         print(Fore.RED + f"Download failed: {e}" + Style.RESET_ALL)
+        metrics.count('downloads', result='failed')
+        if on_error is not None:
+            on_error(e)
         return False
 
+def concurrency_arg(value):
+    """argparse type for --concurrency: a positive integer or 'auto'."""
+    if value == 'auto':
+        return value
+    try:
+        return max(1, int(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}")
+
 # Improved UI with clear sections and better prompts
 def display_banner():
     banner = f"""
@@ -132,33 +2194,84 @@ def display_banner():
     print(Fore.YELLOW + "Paste your YouTube video or playlist link below." + Style.RESET_ALL)
 
 def prompt_with_default(prompt, default):
-    value = input(f"{Fore.GREEN}{prompt} [{default}]: {Style.RESET_ALL}").strip()
+    if _serve_state:
+        # Jobs run unattended: every prompt takes its default (set options instead)
+        return default
+    try:
+        value = input(f"{Fore.GREEN}{prompt} [{default}]: {Style.RESET_ALL}").strip()
+    except EOFError:
+        # `--batch -` used up stdin for the URL list; the remaining prompts take their defaults
+        if args and getattr(args, 'batch', None) == '-':
+            print(default)
+            return default
+        raise
     return value if value else default
 
-# Note: install_dependencies(), display_banner(), and download_path selection
-# are done in the __main__ flow to avoid prompting when using --help.
 
-print(Fore.YELLOW + "\nFetching video information... Please wait." + Style.RESET_ALL)
+def new_batch_source(url):
+    """Per-source counters of a --batch run."""
+    return {'url': url, 'listed': 0, 'duplicates': 0, 'downloaded': 0, 'existing': 0, 'archived': 0, 'failed': 0, 'error': None}
+
+# Note: display_banner() and download_path selection are done in the __main__
+# flow to avoid prompting when using --help.
 
 # Initialize progress state at the very beginning of the function
-def main():
+def main(url=None):
     progress_state = {
         'total_files': 0,
         'finished_files': 0,
-        'current_file': '',
         'start_time': time.time(),
-        'last_bytes': 0,
-        'last_time': time.time(),
-        'internet_speed': 0,
     }
+    if _serve_state.get('job') is not None:
+        # serve mode reports the job's file counts from here
+        _serve_state['job'].progress = progress_state
 
     # ydl_opts will be defined after the progress_hook so the hook variable can be used
 
-    # Improved prompts for user input
-    url = prompt_with_default("Enter YouTube URL", "")
-    if not url:
-        print(Fore.RED + "No URL provided. Exiting." + Style.RESET_ALL)
-        return
+    # --resume rebuilds the work queue from the journal of an interrupted playlist run
+    journal_path = os.path.join(download_path, JOURNAL_FILENAME)
+    resume_items = None
+    # --batch: per-source counters for the final summary (None outside batch mode)
+    batch_sources = None
+    if args and getattr(args, 'resume', False):
+        run = None
+        if os.path.exists(journal_path):
+            run, resume_items = JobJournal.load(journal_path)
+        if run is None:
+            print(Fore.RED + f"No playlist run journal found in {download_path}. Nothing to resume." + Style.RESET_ALL)
+            return EXIT_ERROR
+        if not resume_items:
+            print(Fore.GREEN + "Every entry of the previous run is already done. Nothing to resume." + Style.RESET_ALL)
+            return EXIT_OK
+        url = run['url']
+        if run.get('streamed') and not run.get('listed'):
+            print(Fore.YELLOW + "The previous run was interrupted before its playlist listing finished; entries that were"
+                  " never listed are not resumed. Run again without --resume to pick them up (the archive skips"
+                  " finished ones)." + Style.RESET_ALL)
+        if run.get('sources'):
+            batch_sources = [new_batch_source(u) for u in run['sources']]
+        removed = remove_partial_files(download_path)
+        removed += remove_unconverted(run['unconverted'])
+        print(Fore.YELLOW + f"Resuming {run.get('title') or url}: {len(resume_items)} unfinished entries"
+              f" ({removed} stale partial file(s) removed)." + Style.RESET_ALL)
+    elif args and getattr(args, 'batch', None):
+        try:
+            batch_urls = read_batch_urls(args.batch)
+        except OSError as e:
+            print(Fore.RED + f"Could not read batch file {args.batch}: {e}" + Style.RESET_ALL)
+            return EXIT_ERROR
+        if not batch_urls:
+            print(Fore.RED + "No URLs in the batch input. Exiting." + Style.RESET_ALL)
+            return EXIT_ERROR
+        url = args.batch
+        batch_sources = [new_batch_source(u) for u in batch_urls]
+    else:
+        # Improved prompts for user input
+        if url is None:
+            url = prompt_with_default("Enter YouTube URL", "")
+        if not url:
+            print(Fore.RED + "No URL provided. Exiting." + Style.RESET_ALL)
+            return EXIT_ERROR
 
     print(Fore.YELLOW + "\nGetting video info..." + Style.RESET_ALL)
     # Use flat extraction by default to speed up playlist listing. Users can disable with --no-extract-flat.
@@ -170,36 +2283,78 @@ def main():
         'no_warnings': True,
         'logger': None,
     }
-    # Extract info with timeout and spinner to avoid hanging indefinitely
-    def extract_info_with_timeout(url, opts, timeout=60):
-        result = {'info': None}
-        exc = {'error': None}
+    # Metadata cache shared by the playlist listing and the per-entry resolution
+    meta_cache = None
+    cache_config = None
+    if not (args and getattr(args, 'no_cache', False)):
+        cache_config = {
+            'path': os.path.join(getattr(args, 'cache_dir', None) or DEFAULT_CACHE_DIR, 'metadata.sqlite'),
+            'ttl': getattr(args, 'cache_ttl', DEFAULT_CACHE_TTL),
+            'max_bytes': int(getattr(args, 'cache_size_mb', DEFAULT_CACHE_SIZE_MB) * 1024 * 1024),
+        }
+        try:
+            meta_cache = MetadataCache(**cache_config)
+        except (OSError, sqlite3.Error) as e:
+            print(Fore.YELLOW + f"Metadata cache unavailable ({e}); continuing without it." + Style.RESET_ALL)
+            cache_config = None
+    listing_key = f"listing:{'flat' if ydl_info_opts['extract_flat'] else 'full'}:{url}"
 
-        def worker():
-            try:
-                with YoutubeDL(opts) as ydl:
-                    result['info'] = ydl.extract_info(url, download=False)
-            except Exception as e:
-                exc['error'] = e
+    # Extract info with a deadline and a spinner to avoid hanging indefinitely
+    async def fetch_info(url, opts, timeout=60, listing_ydl=None):
+        """Extract `url` on an executor thread; returns (info, None) or (None, error).
+
+        Past `timeout` the user may keep waiting on the same extraction (no
+        second one is started) for up to twice as long. Giving up closes its
+        YoutubeDL and waits for the thread to end (bounded by the socket
+        timeout), so no extraction is left running behind the next step."""
+        ydl = listing_ydl if listing_ydl is not None else yt_dlp.YoutubeDL(opts)
 
-        t = threading.Thread(target=worker, daemon=True)
-        t.start()
+        def extract():
+            if listing_ydl is not None:
+                # Streaming: unprocessed result, entries are paged in later
+                return open_listing(listing_ydl, url)
+            return ydl.extract_info(url, download=False)
 
-        # Spinner while waiting
+        def stop():
+            ydl.close()
+            sys.stdout.write('\r' + ' ' * 80 + '\r')
+            return asyncio.wait([fut], timeout=ydl.params.get('socket_timeout') or 20)
+
+        loop = asyncio.get_running_loop()
+        exe = concurrent_futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='listing')
+        fut = loop.run_in_executor(exe, extract)
         spinner = itertools.cycle(['|', '/', '-', '\\'])
         waited = 0
         interval = 0.5
-        while t.is_alive() and waited < timeout:
-            sys.stdout.write(Fore.GREEN + f"\rFetching info {next(spinner)} (waited {waited}s)" + Style.RESET_ALL)
-            sys.stdout.flush()
-            time.sleep(interval)
-            waited += interval
-        sys.stdout.write('\r' + ' ' * 80 + '\r')
-        if t.is_alive():
-            return None, 'timeout'
-        if exc['error']:
-            return None, exc['error']
-        return result['info'], None
+        limit = timeout
+        try:
+            while True:
+                while not fut.done() and waited < limit and not job_cancelled():
+                    sys.stdout.write(Fore.GREEN + f"\rFetching info {next(spinner)} (waited {waited:g}s)" + Style.RESET_ALL)
+                    sys.stdout.flush()
+                    await asyncio.wait([fut], timeout=interval)
+                    waited += interval
+                sys.stdout.write('\r' + ' ' * 80 + '\r')
+                if fut.done():
+                    break
+                if limit == timeout and not job_cancelled():
+                    retry = prompt_with_default(f"Fetching info is taking longer than {timeout}s. Continue waiting? (Y/N)", "Y").strip().lower()
+                    if retry in ('y', 'yes'):
+                        limit = timeout * 3
+                        continue
+                await stop()
+                return None, 'timeout'
+        except asyncio.CancelledError:
+            # Ctrl-C: end the extraction before leaving
+            await stop()
+            raise
+        finally:
+            exe.shutdown(wait=False)
+            if listing_ydl is None and fut.done():
+                ydl.close()
+        if fut.exception() is not None:
+            return None, fut.exception()
+        return fut.result(), None
 
     timeout_seconds = 60
     if args and hasattr(args, 'info_timeout') and args.info_timeout:
@@ -208,18 +2363,84 @@ def main():
         except Exception:
             timeout_seconds = timeout_seconds
 
-    info, err = extract_info_with_timeout(url, ydl_info_opts, timeout=timeout_seconds)
+    # --stream-listing: downloads start while the playlist is still being listed
+    streaming = bool(args and getattr(args, 'stream_listing', False)) and resume_items is None
+    listing_ydl = None
+
+    def list_source(source_url):
+        key = f"listing:{'flat' if ydl_info_opts['extract_flat'] else 'full'}:{source_url}"
+        source_info = meta_cache.get(key) if meta_cache else None
+        if source_info is None:
+            with yt_dlp.YoutubeDL(ydl_info_opts) as ydl:
+                source_info = ydl.extract_info(source_url, download=False)
+            if meta_cache is not None and source_info is not None:
+                meta_cache.put(key, source_info)
+        return source_info
+
+    def list_batch():
+        """List every batch source in parallel and merge them into one playlist:
+        entries are deduplicated by video ID across sources (first one wins) and
+        interleaved round-robin, so no source waits for another to finish."""
+        listed = [[] for _ in batch_sources]
+        with concurrent_futures.ThreadPoolExecutor(max_workers=min(BATCH_LISTING_WORKERS, len(batch_sources))) as exe:
+            futures = {exe.submit(list_source, src['url']): n for n, src in enumerate(batch_sources)}
+            for done_count, fut in enumerate(concurrent_futures.as_completed(futures), start=1):
+                n = futures[fut]
+                try:
+                    source_info = fut.result()
+                except Exception as e:
+                    batch_sources[n]['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+                    source_info = None
+                if source_info is not None:
+                    is_list = source_info.get('_type') == 'playlist' or 'entries' in source_info
+                    # A single video is a one-entry source
+                    listed[n] = [e for e in source_info.get('entries') or [] if e] if is_list else [source_info]
+                    batch_sources[n]['listed'] = len(listed[n])
+                print(Fore.YELLOW + f"Listed {done_count}/{len(batch_sources)} sources" + Style.RESET_ALL)
+        seen = set()
+        merged = []
+        for n, (pos, entry) in interleave([(n, item) for item in enumerate(entries, start=1)] for n, entries in enumerate(listed)):
+            key = archive_key(entry) or entry.get('id') or entry.get('webpage_url') or entry.get('url')
+            if key in seen:
+                batch_sources[n]['duplicates'] += 1
+                continue
+            seen.add(key)
+            # Keep the entry's index within its own source for the file name
+            merged.append(dict(entry, dl_index=pos, batch_source=n))
+        duplicates = sum(src['duplicates'] for src in batch_sources)
+        print(Fore.CYAN + f"Batch: {len(batch_sources)} sources, {len(merged)} unique entries ({duplicates} duplicates across sources)." + Style.RESET_ALL)
+        return {'_type': 'playlist', 'title': f"Batch of {len(batch_sources)} sources", 'entries': merged}
+
+    if resume_items is not None:
+        # The journal already holds the listing; only unfinished entries are kept
+        info, err = {'_type': 'playlist', 'title': run.get('title'), 'entries': [e for _, e, _ in resume_items]}, None
+    elif batch_sources is not None:
+        with metrics.phase('listing', url=url):
+            info, err = list_batch(), None
+    else:
+        info = meta_cache.get(listing_key) if meta_cache else None
+        if info is not None:
+            print(Fore.YELLOW + "Using cached video info." + Style.RESET_ALL)
+            err = None
+        else:
+            if streaming:
+                # Stays open: the lazy playlist entries page in through it while downloads run
+                listing_ydl = yt_dlp.YoutubeDL(ydl_info_opts)
+            with metrics.phase('listing', url=url):
+                info, err = asyncio.run(fetch_info(url, ydl_info_opts, timeout=timeout_seconds, listing_ydl=listing_ydl))
     if info is None:
         if err == 'timeout':
-            retry = prompt_with_default(f"Fetching info is taking longer than {timeout_seconds}s. Continue waiting? (Y/N)", "Y").strip().lower()
-            if retry in ('y', 'yes'):
-                info, err = extract_info_with_timeout(url, ydl_info_opts, timeout=timeout_seconds * 2)
-            if info is None:
-                print(Fore.RED + "Failed to fetch video info in time. Try again later or check your network/link." + Style.RESET_ALL)
-                return
+            print(Fore.RED + "Failed to fetch video info in time. Try again later or check your network/link." + Style.RESET_ALL)
+            return EXIT_RETRY_LATER
         else:
             print(Fore.RED + f"Error: Could not fetch video info. Check your link and try again.\nDetails: {err}" + Style.RESET_ALL)
-            return
+            if isinstance(err, BaseException) and classify_failure(err)[0] != 'permanent':
+                return EXIT_RETRY_LATER
+            return EXIT_ERROR
+
+    # A streamed listing is never complete at this point, so it isn't cached
+    if meta_cache is not None and resume_items is None and batch_sources is None and listing_ydl is None:
+        meta_cache.put(listing_key, info)
 
     title = info.get('title', 'Unknown Title')
     print(Fore.CYAN + f"\nTitle: {title}")
@@ -232,7 +2453,8 @@ def main():
     if is_playlist:
         playlist_type = info.get('playlist_type', 'Unknown')
         print(Fore.MAGENTA + f"\nPlaylist detected: {playlist_type}. All videos will be downloaded in best available quality.")
-        progress_state['total_files'] = len(info.get('entries', []))
+        # A streamed listing counts its entries as they arrive
+        progress_state['total_files'] = 0 if streaming else len(info.get('entries', []))
     else:
         progress_state['total_files'] = 1
 
@@ -320,45 +2542,40 @@ def main():
 
     # Lock to protect progress_state when running concurrent downloads
     progress_lock = threading.Lock()
+    # Transient failures are retried; whatever still fails ends up in the failure report
+    retries = RetryQueue(attempts=getattr(args, 'retries', RETRY_ATTEMPTS) if args else RETRY_ATTEMPTS,
+                         backoff=getattr(args, 'retry_backoff', RETRY_BACKOFF) if args else RETRY_BACKOFF)
+    # --fragment-budget: HTTP streams shared by all playlist downloads (set up with the pools)
+    fragment_budget = None
+
+    # Per-download counters plus one renderer thread for the live display
+    renderer = ProgressRenderer(progress_state,
+                                rate=getattr(args, 'progress_rate', 4.0) if args else 4.0,
+                                quiet=bool(args and getattr(args, 'quiet', False)))
 
     def progress_hook(d):
-        if d['status'] == 'downloading':
-            downloaded = d.get('downloaded_bytes', 0)
-            total = d.get('total_bytes', d.get('total_bytes_estimate', 0))
-            percent = (downloaded / total * 100) if total else 0
-            speed = d.get('speed', 0) / 1024 if d.get('speed', 0) else 0
-            eta = d.get('eta', 'N/A')
-            downloaded_mb = downloaded / (1024 * 1024)
-            total_mb = total / (1024 * 1024) if total else 0
-            now = time.time()
-            # Calculate internet speed (MB/s)
-            with progress_lock:
-                bytes_diff = downloaded - progress_state['last_bytes']
-                time_diff = now - progress_state['last_time']
-                if time_diff > 0:
-                    progress_state['internet_speed'] = bytes_diff / time_diff / (1024 * 1024)
-                progress_state['last_bytes'] = downloaded
-                progress_state['last_time'] = now
-            bar_length = 40
-            filled_length = int(bar_length * percent // 100)
-            bar = '█' * filled_length + '-' * (bar_length - filled_length)
-            files_left = progress_state['total_files'] - progress_state['finished_files']
-            elapsed = now - progress_state['start_time']
-            stats = f"Speed: {speed:.2f}KB/s | Net: {progress_state['internet_speed']:.2f}MB/s | ETA: {eta}s | Elapsed: {elapsed:.1f}s | Left: {files_left} | Downloaded: {progress_state['finished_files']}/{progress_state['total_files']}"
-            if progress_state['total_files'] > 1:
-                current_title = progress_state.get('current_file','')
-                sys.stdout.write(Fore.GREEN + f"\r[{bar}] {percent:6.2f}% | {downloaded_mb:6.2f}MB / {total_mb:6.2f}MB | File {progress_state['finished_files']+1}/{progress_state['total_files']} ({current_title}) | {stats}" + Style.RESET_ALL)
-            else:
-                sys.stdout.write(Fore.GREEN + f"\r[{bar}] {percent:6.2f}% | {downloaded_mb:6.2f}MB / {total_mb:6.2f}MB | {stats}" + Style.RESET_ALL)
-            sys.stdout.flush()
-        elif d['status'] == 'finished':
-            with progress_lock:
-                progress_state['finished_files'] += 1
+        # Raising here aborts the transfer of a cancelled run (see download_video)
+        raise_if_cancelled()
+        record_progress(d)
+
+    def record_progress(d, slot_key=None):
+        """Progress bookkeeping of a transfer; worker processes' events come here directly."""
+        renderer.hook(d, slot_key)
+        if d['status'] == 'finished':
+            if fragment_budget is not None:
+                # The download's next format (or the next entry) gets the current share
+                fragment_budget.rebalance()
+            metrics.count('bytes_downloaded', d.get('downloaded_bytes') or d.get('total_bytes') or 0)
+            # One entry can finish several files (video and audio formats, subtitles); entries
+            # are counted once their result is recorded
             print(Fore.CYAN + f"\nDownload finished: {d.get('filename', '')}" + Style.RESET_ALL)
             if os.path.exists(d.get('filename', '')):
                 size = os.path.getsize(d.get('filename', '')) / (1024 * 1024)
                 print(Fore.YELLOW + f"Saved: {d.get('filename', '')} ({size:.2f} MB)" + Style.RESET_ALL)
 
+    # Scan the download folder once; workers share this index for duplicate checks
+    dup_index = DuplicateIndex(download_path)
+
     # Adjust playlist handling to ensure all videos are checked
     # Ensure ydl options have access to the progress hook (defined above)
     ydl_opts = {
@@ -367,12 +2584,16 @@ def main():
         'progress_hooks': [progress_hook],
         'noplaylist': False,
         'quiet': True,
+        # The renderer draws progress; keep yt-dlp's own progress line out of the way
+        'noprogress': True,
         'no_warnings': True,
         'logger': None,
         'writesubtitles': False,
         'writeautomaticsub': False,
         'writethumbnail': False,
         'postprocessors': [],
+        # Record final files (after post-processing) in the duplicate index
+        'post_hooks': [dup_index.add],
     }
 
     # Apply the user's choices to ydl options
@@ -405,99 +2626,781 @@ def main():
             if shutil.which('ffmpeg'):
                 ydl_opts['embedsubtitles'] = True
                 ydl_opts['subtitlesformat'] = 'srt'
+                # The embedsubtitles option alone only takes effect on yt-dlp's CLI; the
+                # post-processor does the embedding (keeping the downloaded subtitle files)
+                ydl_opts['postprocessors'].append({'key': 'FFmpegEmbedSubtitle', 'already_have_subtitle': True})
             else:
                 print(Fore.YELLOW + "FFmpeg not found — cannot embed subtitles; subtitles will be downloaded as separate files." + Style.RESET_ALL)
+    # Post-processors run on their own pool so ffmpeg work doesn't hold a download slot
+    postprocess_pool = None
+    postprocess_workers = getattr(args, 'postprocess_workers', None) if args else None
+    if ydl_opts['postprocessors'] and postprocess_workers != 0:
+        postprocess_pool = PostProcessPool(ydl_opts['postprocessors'], ydl_opts, workers=postprocess_workers, on_file=dup_index.add)
+        ydl_opts['postprocessors'] = []
+        renderer.extra_status = postprocess_pool.status
+
+    # Download archive of finished video IDs (skips known entries without any network call)
+    archive = None
+    if not (args and getattr(args, 'no_archive', False)):
+        archive_path = getattr(args, 'archive_file', None) if args else None
+        archive = DownloadArchive(archive_path or os.path.join(download_path, ARCHIVE_FILENAME))
+
     if is_playlist:
-        entries = [e for e in info.get('entries', []) if e]
-        # Build a list of (idx, entry, url)
-        prepared_entries = []
-        for idx, entry in enumerate(entries, start=1):
+        def prepare_entry(idx, entry):
+            """Return (idx, record, url) for a listed entry, or None when it has no URL.
+            Flat entries become EntryRecords; resolved ones (--no-extract-flat) are
+            kept whole, since dropping them would mean extracting them again."""
             entry_url = entry.get('webpage_url') or entry.get('url') or (f"https://www.youtube.com/watch?v={entry.get('id')}" if entry.get('id') else None)
             if entry.get('id') and not entry.get('webpage_url') and not entry.get('url'):
                 print(Fore.YELLOW + f"Using constructed URL for entry id {entry.get('id')}: {entry_url}" + Style.RESET_ALL)
+            if entry.get('batch_source') is not None:
+                item_source[idx] = entry['batch_source']
             if not entry_url:
                 print(Fore.RED + f"\nSkipping video {idx}: URL not found." + Style.RESET_ALL)
+                count_source(idx, 'failed')
                 with progress_lock:
                     progress_state['finished_files'] += 1
-                continue
-            prepared_entries.append((idx, entry, entry_url))
+                return None
+            return idx, entry if is_resolved(entry) else EntryRecord(entry, entry_url), entry_url
+
+        # --batch: which source each queued entry came from
+        item_source = {}
+
+        def count_source(idx, key):
+            if batch_sources is not None and idx in item_source:
+                with progress_lock:
+                    batch_sources[item_source[idx]][key] += 1
+
+        # Journal the run so an interruption can be resumed with --resume
+        journal = JobJournal(journal_path, append=resume_items is not None)
+        if resume_items is None:
+            journal.start_run(url, title, streamed=streaming,
+                              sources=[src['url'] for src in batch_sources] if batch_sources is not None else None)
+
+        rebuild_archive = archive is not None and bool(args and getattr(args, 'rebuild_archive', False))
+        archive_stats = {'found': 0, 'skipped': 0}
+
+        def admit_entry(item):
+            """Archive check for a queued entry; False when it is already recorded (and counted as done)."""
+            if archive is None:
+                return True
+            idx, entry, _ = item
+            # --rebuild-archive: match the listing against files already on disk and record them
+            if rebuild_archive and entry.get('title') and entry not in archive and dup_index.find(f"{entry['title']}_{entry.get('dl_index') or idx}", preserve_index=True):
+                archive.add(entry)
+                archive_stats['found'] += 1
+            if force_flag or entry not in archive:
+                return True
+            journal.mark(idx, 'done')
+            archive_stats['skipped'] += 1
+            count_source(idx, 'archived')
+            with progress_lock:
+                progress_state['finished_files'] += 1
+            return False
+
+        def report_archive():
+            if rebuild_archive:
+                print(Fore.YELLOW + f"Archive rebuilt: {archive_stats['found']} existing file(s) recorded in {archive.path}." + Style.RESET_ALL)
+            if archive_stats['skipped']:
+                print(Fore.YELLOW + f"Skipping {archive_stats['skipped']} video(s) already recorded in the download archive." + Style.RESET_ALL)
+
+        schedule = getattr(args, 'schedule', 'playlist') if args else 'playlist'
+        stream = None
+        listed = None
+        if streaming:
+            if schedule != 'playlist':
+                print(Fore.YELLOW + "--schedule needs the whole listing; a streamed listing is downloaded in playlist order." + Style.RESET_ALL)
+            # Entries are journaled and archive-checked as they are listed, then queued for download
+            def stream_entry(idx, entry):
+                with progress_lock:
+                    progress_state['total_files'] += 1
+                item = prepare_entry(idx, entry)
+                if item is None:
+                    return None
+                journal.queued([item], sync=False)
+                return item if admit_entry(item) else None
+
+            def listing_done(listing):
+                progress_state['listing'] = False
+                if listing.error is None:
+                    journal.listed(listing.total)
+                    print(Fore.YELLOW + f"Playlist listing complete: {listing.total} entries." + Style.RESET_ALL)
+                report_archive()
+
+            progress_state['listing'] = True
+            stream = PlaylistStream(info.get('entries'), stream_entry, on_done=listing_done)
+            prepared_entries = stream
+        else:
+            # Build a list of (idx, record, url)
+            if resume_items is not None:
+                # Journal entries are already prepared and keep their original playlist indices
+                prepared_entries = list(resume_items)
+                item_source.update((idx, entry['batch_source']) for idx, entry, _ in prepared_entries
+                                   if entry.get('batch_source') is not None)
+            else:
+                entries = [e for e in info.get('entries', []) if e]
+                listed = len(entries)
+                prepared_entries = [item for item in itertools.starmap(prepare_entry, enumerate(entries, start=1)) if item]
+                del entries
+            # Only the compact records stay alive for the run, not the listing
+            info.pop('entries', None)
+            journal.queued(prepared_entries)
+            if listed is not None:
+                journal.listed(listed)
+            if archive is not None:
+                prepared_entries = [item for item in prepared_entries if admit_entry(item)]
+                report_archive()
+            if schedule != 'playlist' and prepared_entries:
+                prepared_entries, known, total_bytes = schedule_entries(prepared_entries, schedule, ESTIMATED_BYTES_PER_SECOND[dl_type])
+                if not known:
+                    print(Fore.YELLOW + "[schedule] The listing has no sizes or durations; keeping playlist order." + Style.RESET_ALL)
+                else:
+                    print(Fore.BLUE + f"[schedule] {schedule}-first: {len(prepared_entries)} entries, about {total_bytes / (1024 * 1024):.0f} MB"
+                          + (f"; {len(prepared_entries) - known} of unknown size counted as the median" if known < len(prepared_entries) else '')
+                          + Style.RESET_ALL)
+
+        # i in 'Processing video i/N' is the playlist index, so N is the whole listing,
+        # including entries skipped by the archive or finished before a resume
+        listing_total = run['entries'] if resume_items is not None else listed
+
+        def entries_label():
+            # Grows while a streamed listing runs
+            if stream is not None:
+                return f"{stream.total}{'+' if progress_state.get('listing') else ''}"
+            return str(listing_total)
 
         # Determine concurrency
         concurrency = 1
+        auto_concurrency = bool(args and getattr(args, 'concurrency', None) == 'auto')
         try:
-            if args and hasattr(args, 'concurrency') and args.concurrency:
+            if auto_concurrency:
+                # Size the pools for the ceiling; the controller gates how many slots are active
+                concurrency = max(1, int(getattr(args, 'max_concurrency', 8)))
+            elif args and hasattr(args, 'concurrency') and args.concurrency:
                 concurrency = max(1, int(args.concurrency))
         except Exception:
             concurrency = 1
 
-        def download_worker(item):
+        entry_opts = ydl_opts.copy()
+        entry_opts['outtmpl'] = os.path.join(download_path, "%(title)s_%(dl_index)s.%(ext)s")
+        entry_opts['noplaylist'] = True
+        # serve mode keeps one pool (and its warm YoutubeDL instances) across jobs
+        ydl_pool = _serve_state.get('ydl_pool') or YDLPool()
+
+        def resolve_entry(item):
+            """Metadata stage: return (idx, entry_url, full_info), or None if the entry failed."""
             idx, entry, entry_url = item
-            title = entry.get('title', f'Video {idx}')
-            print(Fore.CYAN + f"\nProcessing video {idx}/{len(prepared_entries)}: {title}" + Style.RESET_ALL)
+            if cancel_requested():
+                # Left queued in the journal, so --resume picks it up
+                return None
             # Ensure we have full info for prepare_filename; flat entries may lack metadata
             full_info = entry
             try:
-                # If the entry seems "flat" (missing title or id), try to fetch full info for that entry
-                if not full_info.get('title') or not full_info.get('id') or full_info.get('_type') == 'url':
-                    with YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl_inner:
-                        full_info = ydl_inner.extract_info(entry_url, download=False)
+                # Flat entries are only URL references; resolve them with this thread's pooled
+                # YoutubeDL (the download stage reuses its own instance with the same options)
+                if not is_resolved(full_info):
+                    with metrics.phase('resolve', idx=idx):
+                        # A retry fetches fresh metadata (cached format URLs may be what failed)
+                        full_info = resolve_info(ydl_pool.get(entry_opts), entry_url,
+                                                 cache=None if retries.tries(idx) else meta_cache,
+                                                 cache_key=archive_key(entry) or entry_url)
             except Exception as e:
+                if not claim_outcome():
+                    # run_entries gave up on this resolve at its deadline and recorded the entry
+                    return None
                 print(Fore.RED + f"Failed to fetch info for entry {idx}: {e}" + Style.RESET_ALL)
+                metrics.count('resolve_failures')
+                retry_or_fail(idx, entry.get('title'), entry_url, e)
+                journal.mark(idx, 'failed')
+                count_source(idx, 'failed')
                 with progress_lock:
                     progress_state['finished_files'] += 1
+                return None
+            # The playlist index goes through the info dict so every entry shares one option set
+            return idx, entry_url, dict(full_info, dl_index=entry.get('dl_index') or idx)
+
+        def download_entry(resolved):
+            """Download stage: fetch one resolved entry unless it already exists."""
+            idx, entry_url, full_info = resolved
+            if cancel_requested():
                 return False
+            journal.mark(idx, 'in-progress')
+            title = full_info.get('title', f'Video {idx}')
+            print(Fore.CYAN + f"\nProcessing video {idx}/{entries_label()}: {title}" + Style.RESET_ALL)
 
-            entry_opts = ydl_opts.copy()
-            entry_opts['outtmpl'] = os.path.join(download_path, f"%(title)s_{idx}.%(ext)s")
-            entry_opts['noplaylist'] = True
+            errors = []
+            downloaded = []
+            ok = download_video(entry_opts, entry_url, full_info, force=force_flag, preserve_index=True, dup_index=dup_index, ydl_pool=ydl_pool,
+                                on_downloaded=downloaded.append if postprocess_pool else None, fragment_budget=fragment_budget,
+                                on_error=errors.append)
+            if ok is False and not run_cancel.is_set():
+                # No exception means --download-timeout aborted it
+                retry_or_fail(idx, title, entry_url, errors[0] if errors else f"download ran past {download_timeout}s")
+            elif ok is not False:
+                retries.succeeded(idx, entry_url)
+            record_result(idx, ok, full_info, downloaded, entry_url)
+            return ok
 
-            with progress_lock:
-                progress_state['current_file'] = full_info.get('title', '')
+        def retry_or_fail(idx, title, entry_url, error):
+            """Record a failed entry; raises RetryLater when it gets another attempt."""
+            kind, reason = classify_failure(error) if isinstance(error, BaseException) else ('transient', error)
+            delay = retries.failed(idx, title, entry_url, kind, reason)
+            if delay is None or run_cancel.is_set():
+                return
+            metrics.count('retries', kind=kind)
+            journal.mark(idx, 'queued')
+            print(Fore.YELLOW + f"Entry {idx} failed ({kind}: {reason}); attempt {retries.tries(idx) + 1} of "
+                  f"{retries.attempts + 1} in {delay:.1f}s." + Style.RESET_ALL)
+            raise RetryLater(delay)
 
-            ok = download_video(entry_opts, entry_url, full_info, force=force_flag, preserve_index=True)
+        def record_result(idx, ok, full_info, downloaded=None, entry_url=None):
+            """Archive, journal and progress bookkeeping once an entry's download returned."""
+            if ok and downloaded:
+                # Deferred post-processing: the entry is done once its files are converted
+                summary = {k: full_info.get(k) for k in ('id', 'title', 'extractor_key')}
+                journal.mark(idx, 'postprocessing', files=[d['filepath'] for d in downloaded if d.get('filepath')])
+                postprocess_pool.submit_entry(downloaded, lambda error: record_postprocessed(idx, summary, entry_url, downloaded, error))
+                return
+            # None means the file already exists, which counts as done
+            journal.mark(idx, 'done' if ok or ok is None else 'failed')
+            count_source(idx, 'downloaded' if ok else 'existing' if ok is None else 'failed')
             if not ok:
                 print(Fore.YELLOW + f"\nSkipping video {idx}: Already downloaded or failed." + Style.RESET_ALL)
+            if ok is not False and archive is not None:
+                # An existing file is archived too, so later runs drop the entry from the listing
+                archive.add(full_info)
             with progress_lock:
-                # If download_video did not trigger a finished hook (skip), ensure progress is advanced
-                # progress_hook will increment finished_files on successful 'finished' events; for skipped/failed, count here
-                # We guard against double-counting by ensuring finished_files does not exceed total
-                if progress_state['finished_files'] < progress_state['total_files']:
-                    # If the download was skipped (ok == False) the finished counter likely was not incremented
-                    if not ok:
-                        progress_state['finished_files'] += 1
+                progress_state['finished_files'] += 1
                 files_done = progress_state['finished_files']
                 total = progress_state['total_files']
                 left = total - files_done
-            print(Fore.GREEN + f"Progress: {files_done}/{total} downloaded. {left} remaining." + Style.RESET_ALL)
-            return ok
+            more = '+' if progress_state.get('listing') else ''
+            print(Fore.GREEN + f"Progress: {files_done}/{total}{more} downloaded. {left}{more} remaining." + Style.RESET_ALL)
 
-        if concurrency > 1:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as exe:
-                # Submit all tasks and wait
-                futures = {exe.submit(download_worker, item): item for item in prepared_entries}
-                for fut in concurrent.futures.as_completed(futures):
-                    # We simply ensure exceptions are observed
-                    try:
-                        fut.result()
-                    except Exception as e:
-                        item = futures.get(fut)
-                        print(Fore.RED + f"Error downloading {item}: {e}" + Style.RESET_ALL)
-        else:
-            # Sequential fallback
-            for item in prepared_entries:
-                download_worker(item)
+        def record_postprocessed(idx, summary, entry_url, downloaded, error):
+            """Called by the post-processing pool once an entry's files are processed."""
+            if error is None:
+                record_result(idx, True, summary)
+                return
+            remove_unconverted([d['filepath'] for d in downloaded if d.get('filepath')], dup_index)
+            kind, reason = classify_failure(error)
+            retries.failed(idx, summary.get('title'), entry_url, kind, f"post-processing: {reason}", retry=False)
+            journal.mark(idx, 'failed')
+            count_source(idx, 'failed')
+            with progress_lock:
+                progress_state['finished_files'] += 1
+
+        def handle_worker_message(msg):
+            """Parent side of --workers-mode process."""
+            kind = msg[0]
+            if kind == 'log':
+                print(msg[1])
+            elif kind == 'progress':
+                record_progress(msg[2], slot_key=msg[1])
+            elif kind == 'file':
+                dup_index.add(msg[1])
+            elif kind == 'started':
+                journal.mark(msg[1], 'in-progress')
+            elif kind == 'metric':
+                metrics.record(msg[1])
+            elif kind == 'result':
+                _, idx, ok, summary, failure = msg
+                if failure is not None:
+                    # Worker processes don't retry; the failure goes to the report
+                    kind, reason, failed_url = failure
+                    retries.failed(idx, (summary or {}).get('title'), failed_url, kind, reason, retry=False)
+                if summary is None:
+                    # Info fetch failed in the worker
+                    journal.mark(idx, 'failed')
+                    count_source(idx, 'failed')
+                    with progress_lock:
+                        progress_state['finished_files'] += 1
+                else:
+                    record_result(idx, ok, summary, summary.get('downloaded'), summary.get('url'))
+
+        def resolve_timed_out(item):
+            idx, entry, entry_url = item
+            metrics.count('resolve_failures')
+            # A slow extractor or network is worth another attempt, like any transient failure
+            retry_or_fail(idx, entry.get('title'), entry_url, f"no metadata within {timeout_seconds}s")
+            journal.mark(idx, 'failed')
+            count_source(idx, 'failed')
+            with progress_lock:
+                progress_state['finished_files'] += 1
+
+        prefetch = 2
+        if args and getattr(args, 'prefetch', None) is not None:
+            prefetch = max(0, int(args.prefetch))
+
+        workers_mode = getattr(args, 'workers_mode', 'thread') if args else 'thread'
+        if workers_mode == 'process':
+            # These work on the thread pool's scheduler, which worker processes don't go through
+            ignored = [flag for flag, value in (('--memory-limit', getattr(args, 'memory_limit', None)),
+                                                ('--download-timeout', getattr(args, 'download_timeout', 0))) if value]
+            if ignored:
+                print(Fore.YELLOW + f"{' and '.join(ignored)} only apply to --workers-mode thread; ignored." + Style.RESET_ALL)
+            if retries.attempts:
+                print(Fore.YELLOW + "With --workers-mode process failed entries are reported, not retried." + Style.RESET_ALL)
+        memory_limit = getattr(args, 'memory_limit', None) if args else None
+        memory_ceiling = MemoryCeiling(memory_limit) if memory_limit else None
+        # Set when the whole run is cancelled (Ctrl-C or a cancelled serve job), as opposed to one entry's deadline
+        job = _serve_state.get('job')
+        run_cancel = job.cancel if job is not None else threading.Event()
+        download_timeout = (getattr(args, 'download_timeout', 0) if args else 0) or None
+
+        limiter = None
+        controller = None
+        if auto_concurrency:
+            limiter = SlotLimiter(min(AUTO_CONCURRENCY_START, concurrency))
+            renderer.count_bytes = True
+            controller = ConcurrencyController(limiter, renderer.transferred, max_slots=concurrency)
+            print(Fore.BLUE + f"[auto-concurrency] starting with {limiter.limit} slot(s), up to {concurrency}." + Style.RESET_ALL)
+
+        streams = getattr(args, 'fragment_budget', 0) if args else 0
+        if streams and workers_mode == 'process':
+            # Worker processes can't share one budget; each gets a fixed slice of it
+            process_fragments = max(1, streams // concurrency)
+            print(Fore.BLUE + f"[fragment-budget] {streams} streams: {concurrency} worker(s) x {process_fragments} fragment(s)." + Style.RESET_ALL)
+        elif streams:
+            def runnable_slots():
+                return limiter.limit if limiter is not None else concurrency
+
+            def entries_left():
+                # A streamed listing may still grow; count its open end as a full set of slots
+                left = progress_state['total_files'] - progress_state['finished_files']
+                return left + concurrency if progress_state.get('listing') else left
+
+            fragment_budget = FragmentBudget(streams, runnable_slots, entries_left)
+            if streams < concurrency:
+                print(Fore.YELLOW + f"[fragment-budget] {streams} streams allow at most {streams} parallel downloads (--concurrency {concurrency})." + Style.RESET_ALL)
+            print(Fore.BLUE + f"[fragment-budget] {streams} streams: {fragment_budget.share()} fragment(s) per download to start, more as the playlist drains." + Style.RESET_ALL)
+
+        renderer.start()
+        if controller is not None:
+            controller.start()
+        try:
+            if workers_mode == 'process':
+                # Hooks are process-local; workers install their own and report back over a queue
+                process_opts = {k: v for k, v in entry_opts.items() if k not in ('progress_hooks', 'post_hooks', 'logger')}
+                if streams:
+                    process_opts['concurrent_fragment_downloads'] = process_fragments
+                run_process_pool(prepared_entries, process_opts, dup_index, handle_worker_message,
+                                 concurrency=concurrency, force=force_flag, cache_config=cache_config, limiter=limiter,
+                                 defer_postprocessing=postprocess_pool is not None, total=entries_label, cancel=run_cancel)
+            else:
+                # Resolve upcoming entries' metadata while earlier ones download; Ctrl-C or a
+                # cancelled serve job stops the run without leaving worker threads behind
+                asyncio.run(run_entries(prepared_entries, resolve_entry, download_entry,
+                                        concurrency=concurrency, prefetch=prefetch, limiter=limiter,
+                                        executors=_serve_state.get('executors'),
+                                        resolve_timeout=timeout_seconds or None, download_timeout=download_timeout,
+                                        cancel=run_cancel, on_timeout=resolve_timed_out,
+                                        hold_prefetch=memory_ceiling.exceeded if memory_ceiling is not None else None))
+        finally:
+            if controller is not None:
+                controller.stop()
+            if stream is not None:
+                stream.close()
+            renderer.stop()
+            if ydl_pool is not _serve_state.get('ydl_pool'):
+                ydl_pool.close()
+            if postprocess_pool is not None:
+                # Conversions still queued record their entries in the journal
+                postprocess_pool.shutdown()
+            journal.close()
     else:
+        def postprocess_single(downloaded):
+            """Run the deferred post-processing of the video and wait for it; the
+            video is archived only if it succeeded."""
+            postprocessed = []
+            postprocess_pool.submit_entry(downloaded, postprocessed.append)
+            postprocess_pool.shutdown()
+            if postprocessed[0] is None:
+                return True
+            remove_unconverted([d['filepath'] for d in downloaded if d.get('filepath')], dup_index)
+            kind, reason = classify_failure(postprocessed[0])
+            retries.failed(1, info.get('title'), url, kind, f"post-processing: {reason}", retry=False)
+            return False
+
         # Single video download
-        if not download_video(ydl_opts, url, info, force=force_flag):
-            print(Fore.YELLOW + "\nSkipping video: Already downloaded or failed." + Style.RESET_ALL)
+        if archive is not None and args and getattr(args, 'rebuild_archive', False):
+            if info.get('title') and dup_index.find(info['title']):
+                archive.add(info)
+        if archive is not None and not force_flag and info in archive:
+            print(Fore.YELLOW + "\nSkipping video: Already recorded in the download archive." + Style.RESET_ALL)
             progress_state['finished_files'] += 1
         else:
-            files_done = progress_state['finished_files']
-            total = progress_state['total_files']
-            left = total - files_done
-            print(Fore.GREEN + f"Progress: {files_done}/{total} downloaded. {left} remaining." + Style.RESET_ALL)
+            if args and getattr(args, 'fragment_budget', 0):
+                # A single video has the whole budget to itself
+                ydl_opts['concurrent_fragment_downloads'] = args.fragment_budget
+            renderer.start()
+            try:
+                while True:
+                    errors = []
+                    downloaded = []
+                    ok = download_video(ydl_opts, url, info, force=force_flag, dup_index=dup_index,
+                                        on_downloaded=downloaded.append if postprocess_pool else None,
+                                        on_error=errors.append)
+                    if ok is not False or not errors:
+                        break
+                    kind, reason = classify_failure(errors[0])
+                    delay = retries.failed(1, info.get('title'), url, kind, reason)
+                    if delay is None:
+                        break
+                    metrics.count('retries', kind=kind)
+                    print(Fore.YELLOW + f"Download failed ({kind}: {reason}); attempt {retries.tries(1) + 1} of "
+                          f"{retries.attempts + 1} in {delay:.1f}s." + Style.RESET_ALL)
+                    time.sleep(delay)
+                if ok is not False:
+                    retries.succeeded(1, url)
+            finally:
+                renderer.stop()
+            progress_state['finished_files'] += 1
+            if not ok:
+                print(Fore.YELLOW + "\nSkipping video: Already downloaded or failed." + Style.RESET_ALL)
+                if ok is None and archive is not None:
+                    # The file already exists: archive it so later runs skip the video up front
+                    archive.add(info)
+            elif not downloaded or postprocess_single(downloaded):
+                if archive is not None:
+                    archive.add(info)
+                files_done = progress_state['finished_files']
+                total = progress_state['total_files']
+                left = total - files_done
+                print(Fore.GREEN + f"Progress: {files_done}/{total} downloaded. {left} remaining." + Style.RESET_ALL)
+        if postprocess_pool is not None:
+            postprocess_pool.shutdown()
+    if batch_sources is not None:
+        print_batch_summary(batch_sources)
+    if listing_ydl is not None:
+        listing_ydl.close()
+    if meta_cache is not None:
+        meta_cache.close()
+    return retries.report(getattr(args, 'failure_report', None) if args else None, resumable=is_playlist)
 
-if __name__ == "__main__":
+# serve mode: the daemon's shared resources and the job being run (empty otherwise)
+_serve_state = {}
+
+
+def job_cancelled():
+    """True when the serve-mode job being run has been cancelled."""
+    job = _serve_state.get('job')
+    return job is not None and job.cancel.is_set()
+
+
+class ServeJob:
+    """One queued download in serve mode: a URL and the CLI options to run it with."""
+
+    def __init__(self, job_id, url, options, job_args):
+        self.id = job_id
+        self.url = url
+        self.options = options
+        self.args = job_args
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.exit_code = None
+        self.progress = None
+        self.cancel = threading.Event()
+
+    def to_dict(self):
+        progress = self.progress or {}
+        return {'id': self.id, 'url': self.url, 'options': self.options, 'status': self.status,
+                'created': self.created, 'started': self.started, 'finished': self.finished, 'error': self.error,
+                'exit_code': self.exit_code,
+                'files': {'finished': progress.get('finished_files', 0), 'total': progress.get('total_files', 0)}}
+
+
+class JobServer:
+    """serve mode: a resident downloader that runs jobs from a local HTTP API.
+
+    Jobs run one at a time on a dispatcher thread through main(), with every
+    prompt answered by its default. The process keeps yt-dlp imported, and
+    one YDLPool plus the resolve/download thread pools live across jobs, so
+    later jobs reuse warm YoutubeDL instances (thread worker mode)."""
+
+    def __init__(self, default_dir, workers=SERVE_WORKERS):
+        self.default_dir = default_dir
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._current = None
+        self.ydl_pool = YDLPool(rebind_hooks=True, max_per_thread=SERVE_YDL_INSTANCES)
+        self.executors = (concurrent_futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='serve-resolve'),
+                          concurrent_futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='serve-download'))
+        self._dispatcher = threading.Thread(target=self._dispatch, name='serve-jobs', daemon=True)
+
+    def job_args(self, options):
+        """Turn a job's options ({"audio": true, "quality": "720", ...} keyed by
+        CLI flag names) into parsed arguments; ValueError if they are invalid."""
+        argv = []
+        for key, value in (options or {}).items():
+            dest = key.lstrip('-').replace('-', '_')
+            if dest in SERVE_DAEMON_OPTIONS:
+                raise ValueError(f"option '{key}' can't be set per job")
+            if value is None or value is False:
+                continue
+            argv.append('--' + dest.replace('_', '-'))
+            if value is not True:
+                argv.append(str(value))
+        parser = build_arg_parser()
+        try:
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                job_args = parser.parse_args(argv)
+        except SystemExit:
+            raise ValueError(err.getvalue().strip().splitlines()[-1] if err.getvalue().strip() else 'invalid options')
+        if job_args.batch == '-':
+            raise ValueError("'batch' needs a file path in serve mode")
+        for dest in SERVE_JOB_PATHS:
+            if getattr(job_args, dest):
+                setattr(job_args, dest, self.confine(dest, getattr(job_args, dest)))
+        job_args.dir = job_args.dir or self.default_dir
+        # The daemon's log is not a terminal; keep the live display out of it
+        job_args.quiet = True
+        return job_args
+
+    def confine(self, dest, path):
+        """Resolve a job's path option against the daemon's --dir; ValueError if it points outside it."""
+        root = os.path.realpath(self.default_dir)
+        full = os.path.realpath(os.path.join(root, os.path.expanduser(path)))
+        if os.path.commonpath([root, full]) != root:
+            raise ValueError(f"'{dest}' must be inside {root}")
+        return full
+
+    def submit(self, payload):
+        url = payload.get('url')
+        options = payload.get('options') or {}
+        if not isinstance(options, dict):
+            raise ValueError("'options' must be an object")
+        job_args = self.job_args(options)
+        if not url and not job_args.batch and not job_args.resume:
+            raise ValueError("'url' is required")
+        with self._lock:
+            job = ServeJob(str(next(self._ids)), url, options, job_args)
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        print(Fore.CYAN + f"[serve] job {job.id} queued: {url or job_args.batch or 'resume'}" + Style.RESET_ALL)
+        return job
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status in ('queued', 'running'):
+            job.cancel.set()
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished = time.time()
+        return job
+
+    def _dispatch(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancel.is_set():
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        global args, download_path
+        args, download_path = job.args, job.args.dir
+        job.status = 'running'
+        job.started = time.time()
+        print(Fore.CYAN + f"[serve] job {job.id} started" + Style.RESET_ALL)
+        _serve_state['job'] = job
+        try:
+            os.makedirs(download_path, exist_ok=True)
+            job.exit_code = main(url=job.url)
+            # Failed entries (EXIT_FAILED_ENTRIES, EXIT_RETRY_LATER) fail the job too; exit_code tells them apart
+            job.status = 'cancelled' if job.cancel.is_set() else 'done' if job.exit_code == EXIT_OK else 'failed'
+        except Exception as e:
+            job.status = 'cancelled' if job.cancel.is_set() else 'failed'
+            job.error = str(e)
+            print(Fore.RED + f"[serve] job {job.id} failed: {e}" + Style.RESET_ALL)
+        finally:
+            _serve_state['job'] = None
+            job.finished = time.time()
+        print(Fore.CYAN + f"[serve] job {job.id} {job.status}" + Style.RESET_ALL)
+
+    def start(self):
+        _serve_state.update(ydl_pool=self.ydl_pool, executors=self.executors, job=None)
+        self._dispatcher.start()
+
+    def stop(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        self._queue.put(None)
+        self._dispatcher.join()
+        for exe in self.executors:
+            exe.shutdown(wait=True)
+        self.ydl_pool.close()
+        _serve_state.clear()
+
+
+def serve(server_args):
+    """Run the job API until interrupted: HTTP on a loopback address, or on a
+    Unix socket with --socket.
+
+    POST /jobs {"url": ..., "options": {...}} enqueues, GET /jobs lists,
+    GET /jobs/<id> shows one job, DELETE /jobs/<id> (or POST /jobs/<id>/cancel)
+    cancels it."""
+    import http.server
+    import socketserver
+
+    jobs = JobServer(server_args.dir or os.getcwd(), workers=server_args.serve_workers)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        server_version = 'youtube_downloader'
+
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _job_id(self):
+            parts = self.path.strip('/').split('/')
+            return parts[1] if len(parts) >= 2 and parts[0] == 'jobs' else None
+
+        def _refused(self):
+            """Send 403 and return True for requests a web page could have made: a
+            Host other than loopback (DNS rebinding) or a foreign Origin (CSRF)."""
+            if server_args.socket:
+                # Browsers can't reach a Unix socket
+                return False
+            host = urllib.parse.urlsplit('//' + (self.headers.get('Host') or '')).hostname
+            origin = self.headers.get('Origin')
+            if host in SERVE_LOOPBACK_HOSTS and (origin is None or urllib.parse.urlsplit(origin).hostname in SERVE_LOOPBACK_HOSTS):
+                return False
+            self._send(403, {'error': 'only local clients may use this API'})
+            return True
+
+        def do_GET(self):
+            if self._refused():
+                return
+            if self.path.rstrip('/') == '/jobs':
+                self._send(200, [job.to_dict() for job in list(jobs.jobs.values())])
+                return
+            job = jobs.jobs.get(self._job_id())
+            if job is None:
+                self._send(404, {'error': 'no such job'})
+            else:
+                self._send(200, job.to_dict())
+
+        def do_POST(self):
+            if self._refused():
+                return
+            if self.path.rstrip('/').endswith('/cancel'):
+                self.do_DELETE()
+                return
+            if self.path.rstrip('/') != '/jobs':
+                self._send(404, {'error': 'not found'})
+                return
+            if (self.headers.get('Content-Type') or '').split(';')[0].strip().lower() != 'application/json':
+                # A form or text/plain body is what a cross-site page can send without a preflight
+                self._send(415, {'error': 'expected Content-Type: application/json'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(payload, dict):
+                    raise ValueError('expected a JSON object')
+                job = jobs.submit(payload)
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+                return
+            self._send(201, job.to_dict())
+
+        def do_DELETE(self):
+            if self._refused():
+                return
+            job = jobs.cancel(self._job_id())
+            if job is None:
+                self._send(404, {'error': 'no such job'})
+            else:
+                self._send(200, job.to_dict())
+
+        def address_string(self):
+            # Unix socket peers have no address
+            return str(self.client_address[0]) if self.client_address else 'unix'
+
+        def log_message(self, format, *log_args):
+            pass
+
+    if server_args.socket:
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        # Only a stale socket is replaced; any other file at that path is left alone
+        if os.path.lexists(server_args.socket):
+            if not _is_socket(server_args.socket):
+                print(Fore.RED + f"Refusing to serve on {server_args.socket}: it exists and is not a socket." + Style.RESET_ALL)
+                return
+            os.remove(server_args.socket)
+        httpd = UnixHTTPServer(server_args.socket, Handler)
+        where = f"unix:{server_args.socket}"
+    else:
+        host, _, port = (server_args.listen or SERVE_DEFAULT_LISTEN).rpartition(':')
+        host = host.strip('[]') or '127.0.0.1'
+        if host not in ('127.0.0.1', 'localhost', '::1'):
+            print(Fore.RED + f"Refusing to serve on {host}: the job API has no authentication, use a loopback address." + Style.RESET_ALL)
+            return
+        httpd = http.server.ThreadingHTTPServer((host, int(port)), Handler)
+        where = f"http://{host}:{port}"
+    jobs.start()
+    print(Fore.GREEN + f"[serve] listening on {where} (downloads go to {jobs.default_dir} unless a job sets 'dir')" + Style.RESET_ALL)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(Fore.YELLOW + "\n[serve] shutting down..." + Style.RESET_ALL)
+    finally:
+        httpd.server_close()
+        jobs.stop()
+        if server_args.socket and _is_socket(server_args.socket):
+            os.remove(server_args.socket)
+
+
+def _is_socket(path):
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except OSError:
+        return False
+
+
+def startup_report(module_ms, runs=5):
+    """Time cold starts of `--help` in fresh interpreters and break down where
+    the time goes in this one."""
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--help'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - t0) * 1000)
+    cold_ms = sorted(samples)[len(samples) // 2]
+    lazy = []
+    for name, module in (('yt_dlp', yt_dlp), ('psutil', psutil)):
+        t0 = time.perf_counter()
+        getattr(module, '__name__')
+        lazy.append((name, (time.perf_counter() - t0) * 1000))
+    print(f"Cold start (--help, median of {runs}): {cold_ms:.0f} ms (budget {STARTUP_BUDGET_MS} ms)")
+    print(f"  script load (stdlib + colorama): {module_ms:.1f} ms")
+    for name, ms in lazy:
+        print(f"  {name} (deferred until first use): {ms:.1f} ms")
+    if cold_ms > STARTUP_BUDGET_MS:
+        print(Fore.RED + "Cold start is over budget." + Style.RESET_ALL)
+        return False
+    print(Fore.GREEN + "Cold start is within budget." + Style.RESET_ALL)
+    return True
+
+
+def build_arg_parser():
+    """Command-line options (also used by the benchmark harness to drive main())."""
     parser = argparse.ArgumentParser(description='Easy YouTube Downloader (simple filesystem duplicate check)')
     # Removed DB maintenance CLI flags; the script now checks for file existence only.
     parser.add_argument('--audio', action='store_true', help='Download audio only (non-interactive)')
@@ -510,21 +3413,78 @@ if __name__ == "__main__":
     parser.add_argument('--sub-lang', type=str, default=None, help='Comma-separated list of subtitle languages (e.g., en,es)')
     parser.add_argument('--embed-subtitles', action='store_true', help='Embed subtitles into the video file (requires ffmpeg)')
     parser.add_argument('--dir', type=str, default=None, help='Specify download directory to operate on (overrides interactive prompt)')
-    parser.add_argument('--info-timeout', type=int, default=60, help='Timeout in seconds for fetching video info (default 60)')
+    parser.add_argument('--info-timeout', type=int, default=60, help='Timeout in seconds for fetching video info, for the link and for each playlist entry (default 60)')
+    parser.add_argument('--download-timeout', type=int, default=0, help='Abort a playlist entry whose download takes longer than this many seconds; its partial files are removed (default 0: no limit)')
     parser.add_argument('--extract-flat', dest='extract_flat', action='store_true', help='(deprecated) kept for compatibility')
     parser.add_argument('--no-extract-flat', dest='no_extract_flat', action='store_true', help='Disable fast flat extraction for playlist listing')
-    parser.add_argument('--concurrency', type=int, default=1, help='Number of concurrent downloads for playlists (default 1)')
+    parser.add_argument('--concurrency', type=concurrency_arg, default=1, help="Number of concurrent downloads for playlists (default 1), or 'auto' to adapt it to measured throughput and host load")
+    parser.add_argument('--max-concurrency', type=int, default=8, help='Upper bound on download slots with --concurrency auto (default 8)')
+    parser.add_argument('--workers-mode', choices=['thread', 'process'], default='thread', help='Run playlist downloads in a thread pool (default) or a process pool of --concurrency workers')
+    parser.add_argument('--batch', type=str, default=None, metavar='FILE', help="Download every URL listed in FILE (one per line, '-' reads stdin) on one shared pool, skipping videos shared between sources")
+    parser.add_argument('--stream-listing', action='store_true', help='Start downloading playlist entries while the playlist is still being listed (entries are paged in lazily)')
+    parser.add_argument('--fragment-budget', type=int, default=0, metavar='N', help='Total HTTP fragment streams shared by all running downloads: split evenly between parallel entries and given to the remaining ones as the playlist drains (default 0: one stream per download)')
+    parser.add_argument('--retries', type=int, default=RETRY_ATTEMPTS, help=f'Extra attempts for entries that failed transiently (throttling, network errors); permanent failures are never retried (default {RETRY_ATTEMPTS})')
+    parser.add_argument('--retry-backoff', type=float, default=RETRY_BACKOFF, help=f'Base delay in seconds before a retry, doubled (with jitter) on each further attempt (default {RETRY_BACKOFF:g})')
+    parser.add_argument('--failure-report', type=str, default=None, metavar='PATH', help='Write the entries that failed (with their kind, reason and attempts) to PATH as JSON')
+    parser.add_argument('--memory-limit', type=float, default=None, metavar='MB', help='Pause resolving playlist entries ahead of the downloads while the process uses more than MB of memory (RSS)')
+    parser.add_argument('--schedule', choices=SCHEDULE_POLICIES, default='playlist', help="Download order of playlist entries: 'longest' first (shortest overall run with --concurrency), 'shortest' first (first files soonest) or 'playlist' order (default); file names keep their playlist index")
+    parser.add_argument('--prefetch', type=int, default=2, help='Playlist entries whose metadata is resolved ahead of the downloads (0 disables, default 2)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk metadata cache (neither read nor write it)')
+    parser.add_argument('--cache-dir', type=str, default=None, help=f'Directory of the metadata cache (default {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-ttl', type=int, default=DEFAULT_CACHE_TTL, help=f'Seconds cached metadata (incl. expiring format URLs) stays valid (default {DEFAULT_CACHE_TTL})')
+    parser.add_argument('--cache-size-mb', type=float, default=DEFAULT_CACHE_SIZE_MB, help=f'Size cap of the metadata cache; least recently used entries are evicted (default {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--quiet', action='store_true', help='Headless mode: no live progress display (per-file messages are still printed)')
+    parser.add_argument('--progress-rate', type=float, default=4.0, help='Redraws per second of the live progress display (default 4)')
+    parser.add_argument('--postprocess-workers', type=int, default=None, help='Parallel ffmpeg post-processing jobs (MP3 conversion, subtitle embedding); default CPU count, 0 runs them inside the download slot')
+    parser.add_argument('--resume', action='store_true', help='Resume the interrupted playlist run recorded in the download folder (only unfinished entries are downloaded)')
+    parser.add_argument('--archive-file', type=str, default=None, help=f'Download archive of finished video IDs (default: {ARCHIVE_FILENAME} in the download folder)')
+    parser.add_argument('--no-archive', action='store_true', help='Do not read or update the download archive')
+    parser.add_argument('--rebuild-archive', action='store_true', help='Record entries whose files already exist in the download folder into the archive')
+    parser.add_argument('--metrics-jsonl', type=str, default=None, metavar='PATH', help='Append one JSON line per timed phase (listing, scan, resolve, dedupe, transfer, postprocess) plus a run summary to PATH')
+    parser.add_argument('--metrics-prom', type=str, default=None, metavar='PATH', help='Write phase histograms and counters to PATH in Prometheus textfile-collector format')
+    parser.add_argument('--metrics-interval', type=float, default=METRICS_INTERVAL, help=f'Seconds between metrics file updates during the run (0: only at the end, default {METRICS_INTERVAL:g})')
+    parser.add_argument('--serve', action='store_true', help='Run as a resident daemon that takes download jobs from a local HTTP API (see README)')
+    parser.add_argument('--listen', type=str, default=SERVE_DEFAULT_LISTEN, metavar='HOST:PORT', help=f'Loopback address of the --serve API (default {SERVE_DEFAULT_LISTEN})')
+    parser.add_argument('--socket', type=str, default=None, metavar='PATH', help='Serve the --serve API on a Unix socket instead of TCP')
+    parser.add_argument('--serve-workers', type=int, default=SERVE_WORKERS, help=f'Persistent download threads of --serve; caps a job\'s --concurrency (default {SERVE_WORKERS})')
+    parser.add_argument('--install-deps', action='store_true', help='Install missing dependencies (yt-dlp, colorama, psutil) and exit')
+    parser.add_argument('--startup-report', action='store_true', help=f'Measure cold-start time against the {STARTUP_BUDGET_MS} ms budget and exit')
+    return parser
+
+
+if __name__ == "__main__":
+    _module_ms = (time.perf_counter() - _MODULE_T0) * 1000
+    parser = build_arg_parser()
     args = parser.parse_args()
-    # Install dependencies and show banner
-    install_dependencies()
+    if args.install_deps:
+        missing = install_dependencies()
+        print(f"Installed: {', '.join(missing)}" if missing else "All dependencies are installed.")
+        sys.exit(0)
+    if args.startup_report:
+        sys.exit(0 if startup_report(_module_ms) else 1)
+    if args.serve:
+        metrics.configure(jsonl_path=args.metrics_jsonl, prom_path=args.metrics_prom, interval=args.metrics_interval)
+        metrics.start()
+        try:
+            serve(args)
+        finally:
+            metrics.stop()
+        sys.exit(0)
     display_banner()
 
     if args.dir:
         download_path = args.dir
     else:
         download_path = get_download_path()
+    status = EXIT_OK
     try:
         os.makedirs(download_path, exist_ok=True)
-        main()
+        metrics.configure(jsonl_path=args.metrics_jsonl, prom_path=args.metrics_prom, interval=args.metrics_interval)
+        metrics.start()
+        status = main()
     except (KeyboardInterrupt, EOFError):
-        print(Fore.RED + "\nExited by user. Goodbye!" + Style.RESET_ALL)
\ No newline at end of file
+        print(Fore.RED + "\nExited by user. Goodbye!" + Style.RESET_ALL)
+        status = 130
+    finally:
+        metrics.stop()
+    sys.exit(status or EXIT_OK)
\ No newline at end of file